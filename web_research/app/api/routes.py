@@ -1,24 +1,40 @@
-from langgraph.checkpoint.memory import MemorySaver
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import JSONResponse, StreamingResponse
-from app.core.graph import create_graph
-from app.utils.helper import run_research_agent
-from app.services.cache import get_task_status, store_task_status
-from app.models.models import SearchRequest, TaskStatusResponse
+from starlette.background import BackgroundTask
+from app.services.checkpointer import get_cached_stats, get_or_create_graph
+from app.services.checkpoint_retention import checkpoint_compactor, get_compaction_stats, get_thread_checkpoint_stats
+from app.services.cache import get_task_status, get_thread_meta, store_task_status, store_thread_meta
+from app.services.job_queue import enqueue_research_job
+from app.services.cancellation import cancellation_registry
+from app.services import admission
+from app.services.job_queue import get_queue_stats
+from app.services.llm_cache import get_llm_cache_stats
+from app.services.search_cache import get_search_cache_stats
+from app.core.tools.scheduler import get_tool_scheduler
+from app.utils.config import get_settings
+from app.services.task_events import wait_for_task_update, subscribe_task_updates
+from app.models.models import ResumeRequest, SearchRequest, TaskStatusResponse
 from app.core.agent import run_agent_streaming
 from app.utils.logger import logger
 from uuid import uuid4
 import asyncio
-from typing import Dict
+from typing import Optional
 import json
 
-running_research_task: Dict[str, asyncio.Task] = {}
 router = APIRouter()
 
+async def admit(api_key: Optional[str], depth: Optional[str], max_iteration: Optional[int], renew: bool = True) -> Optional[admission.Lease]:
+    """Admission lease for a run started by this request, or 429 with Retry-After when saturated"""
+    try:
+        return await admission.acquire(api_key, depth, max_iteration, wait=get_settings().admission_queue_timeout, renew=renew)
+    except admission.AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 @router.post("/research")
 async def research_sync(request: SearchRequest):
     """Synchronous endpoint; internal test use only; must stay connected"""
 
+    lease = await admit(request.api_key, request.depth, request.max_iteration)
     try:
         thread_id = uuid4().hex
         logger.info(
@@ -28,11 +44,10 @@ async def research_sync(request: SearchRequest):
         )
         research_depth = request.depth
 
-        checkpointer = MemorySaver()
-        app_graph = create_graph(
-            checkpointer=checkpointer,
+        app_graph = await get_or_create_graph(
+            model_provider=request.model_provider,
             model_name=request.model_name,
-            model_provider=request.model_provider
+            model_routing=request.model_routing
         )
         
         config = {"configurable": {"thread_id": str(thread_id)}}
@@ -44,7 +59,16 @@ async def research_sync(request: SearchRequest):
             "is_complete": False,
             "search_results": [],
         }
-        result = await app_graph.ainvoke(initial_state, config=config)
+        await store_thread_meta(thread_id, {
+            "query": request.query,
+            "max_iteration": request.max_iteration,
+            "depth": request.depth,
+            "model_provider": request.model_provider,
+            "model_name": request.model_name,
+            "model_routing": request.model_routing
+        })
+        result = await app_graph.ainvoke(initial_state, config=config, context={"api_key": request.api_key})
+        checkpoint_compactor.schedule(thread_id)
 
         logger.info(
             f"[research_sync] Completed | thread_id={thread_id} | "
@@ -66,13 +90,22 @@ async def research_sync(request: SearchRequest):
         logger.exception(f"[research_sync] Error | thread_id={thread_id}")
         raise HTTPException(status_code=500, detail=f"Error running research task: {str(e)}")
 
+    finally:
+        await admission.release(lease)
+
 @router.post("/research/async")
-async def research_async(request: SearchRequest, background_tasks: BackgroundTasks):
+async def research_async(request: SearchRequest):
     """
     Non-Blocking
-    Runs the agent as background task and return task_id
+    Queues the research job on the Redis stream for a worker (python -m app.worker) and returns task_id
     CLient could disconnect and poll for results later
+    Admission is applied by the worker; here only a full queue is refused
     """
+    settings = get_settings()
+    if settings.admission_control:
+        queue_stats = await get_queue_stats()
+        if (queue_stats.get("lag") or 0) >= settings.admission_max_queued_jobs:
+            raise HTTPException(status_code=429, detail="Research queue is full, retry later", headers={"Retry-After": str(settings.admission_retry_after)})
 
     try:
         task_id = str(uuid4().hex)
@@ -89,16 +122,17 @@ async def research_async(request: SearchRequest, background_tasks: BackgroundTas
             "query": request.query
         })
 
-        background_tasks.add_task(
-            run_research_agent,
-            task_id,
-            thread_id,
-            request.query,
-            request.max_iteration,
-            request.depth,
-            request.model_provider,
-            request.model_name
-        )
+        message_id = await enqueue_research_job({
+            "task_id": task_id,
+            "thread_id": thread_id,
+            "query": request.query,
+            "max_iteration": request.max_iteration,
+            "depth": request.depth,
+            "model_provider": request.model_provider,
+            "model_name": request.model_name,
+            "model_routing": request.model_routing
+        }, api_key=request.api_key)
+        logger.info(f"[research_async] Queued | task_id={task_id} | message_id={message_id}")
 
         return {
             "task_id": task_id,
@@ -107,17 +141,21 @@ async def research_async(request: SearchRequest, background_tasks: BackgroundTas
             "message": "Research task started. Use GET /research/status/{task_id} to check progress"
         }
     except Exception as e:
-        logger.exception(f"[research_async] Error starting background task | task_id={task_id}")
+        logger.exception(f"[research_async] Error queueing research job | task_id={task_id}")
         raise HTTPException(status_code=500, detail=f"Error starting research task: {str(e)}")
     
 @router.get("/research/status/{task_id}", response_model=TaskStatusResponse)
-async def get_research_status(task_id: str):
+async def get_research_status(task_id: str, wait: int = Query(default=0, ge=0, le=60)):
     """
     Check the status of the background research task
-    status values: pending, processing, completed, failed
+    status values: pending, processing, completed, failed, cancelled
+    With ?wait=N the request is held for up to N seconds until the status changes (long-poll)
     """
     try:
-        task_data = await get_task_status(task_id)
+        if wait:
+            task_data = await wait_for_task_update(task_id, wait)
+        else:
+            task_data = await get_task_status(task_id)
 
         if not task_data:
             logger.warning(f"[get_research_status] Task not found | task_id={task_id}")
@@ -126,36 +164,76 @@ async def get_research_status(task_id: str):
         logger.debug(f"[get_research_status] Task status | task_id={task_id} | status={task_data.get('status')}")
         return TaskStatusResponse(**task_data)
     
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.exception(f"[get_research_status] Error | task_id={task_id}")
         raise HTTPException(status_code=500, detail=f"Error retrieving task status: {str(e)}")
-    
 
-@router.post("/research/stream")
-async def research_stream(request: SearchRequest):
-    """Streaming generated tokens for chat app"""
-    thread_id = uuid4().hex
-    logger.info(
-        f"[research_stream] Start stream | thread_id={thread_id} | "
-        f"query={request.query!r} | depth={request.depth} | "
-        f"max_iter={request.max_iteration} | model={request.model_provider}:{request.model_name}"
+@router.get("/research/status/{task_id}/events")
+async def research_status_events(task_id: str):
+    """SSE stream of status transitions (pending -> processing -> completed/failed) for a background task"""
+    if not await get_task_status(task_id):
+        raise HTTPException(status_code=404, detail="Task Not Found")
+
+    async def event_generator():
+        try:
+            async for task_data in subscribe_task_updates(task_id):
+                if task_data is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps({'type': 'status', **task_data})}\n\n"
+
+        except asyncio.CancelledError:
+            logger.info(f"[research_status_events] Client disconnected | task_id={task_id}")
+            raise
+
+        except Exception as e:
+            logger.exception(f"[research_status_events] Exception in event_generator | task_id={task_id}")
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
     )
     
+
+def stream_agent_events(
+    thread_id: str,
+    started_event: dict,
+    agent_events,
+    lease: Optional[admission.Lease] = None,
+    claimed: bool = False
+) -> StreamingResponse:
+    """
+    SSE response for a streaming run; the agent registers it so /research/cancel can stop it.
+    The admission lease (admitted with `renew=False`) is renewed from the first iteration and held
+    until the stream ends. If the client leaves before the stream starts, the background task
+    releases the lease and the resume claim (`claimed`, otherwise released by the agent run itself);
+    should that not run either, the unrenewed lease expires after admission_lease_ttl.
+    """
+    agent_started = False
+
+    async def release_run():
+        await admission.release(lease)
+        if claimed and not agent_started:
+            await cancellation_registry.unregister(thread_id)
+
     async def event_generator():
-        current_task = asyncio.current_task()
-        running_research_task[thread_id] = current_task
+        nonlocal agent_started
+        if lease is not None:
+            lease.start_renewing()
         try:
-            yield f"data: {json.dumps({'type': 'started', 'thread_id': str(thread_id), 'query': request.query})}\n\n"
-
-            async for event in run_agent_streaming(
-                thread_id=thread_id,
-                query=request.query,
-                max_iteration=request.max_iteration,
-                depth=request.depth,
-                model_provider=request.model_provider,
-                model_name=request.model_name,
-                api_key = request.api_key
-            ):
+            yield f"data: {json.dumps(started_event)}\n\n"
+
+            agent_started = True
+            async for event in agent_events:
                 event_type = event.get("type")
                 
                 if event_type == "node_start":
@@ -187,7 +265,7 @@ async def research_stream(request: SearchRequest):
             yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
 
         finally:
-            running_research_task.pop(thread_id, None)
+            await release_run()
 
     return StreamingResponse(
         event_generator(),
@@ -196,22 +274,137 @@ async def research_stream(request: SearchRequest):
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "X-Accel-Buffering": "no"
-        }
+        },
+        background=BackgroundTask(release_run)
+    )
+
+@router.post("/research/stream")
+async def research_stream(request: SearchRequest):
+    """Streaming generated tokens for chat app"""
+    thread_id = uuid4().hex
+    logger.info(
+        f"[research_stream] Start stream | thread_id={thread_id} | "
+        f"query={request.query!r} | depth={request.depth} | "
+        f"max_iter={request.max_iteration} | model={request.model_provider}:{request.model_name}"
+    )
+    lease = await admit(request.api_key, request.depth, request.max_iteration, renew=False)
+
+    return stream_agent_events(
+        thread_id,
+        {'type': 'started', 'thread_id': str(thread_id), 'query': request.query},
+        run_agent_streaming(
+            thread_id=thread_id,
+            query=request.query,
+            max_iteration=request.max_iteration,
+            depth=request.depth,
+            model_provider=request.model_provider,
+            model_name=request.model_name,
+            api_key = request.api_key,
+            model_routing=request.model_routing
+        ),
+        lease
+    )
+
+@router.post("/research/resume/{thread_id}")
+async def research_resume(thread_id: str, request: Optional[ResumeRequest] = None):
+    """
+    Continue an interrupted run (cancelled stream, crashed worker) from its latest checkpoint.
+    Finished nodes are skipped; only the remaining work is streamed, in the /research/stream format.
+    """
+    meta = await get_thread_meta(thread_id)
+    if not meta:
+        raise HTTPException(status_code=404, detail="Thread Not Found")
+
+    # Claimed atomically, so a double click or client retry cannot start a second resume of the thread
+    if not await cancellation_registry.claim(thread_id):
+        raise HTTPException(status_code=409, detail="Thread is still running")
+
+    try:
+        try:
+            app_graph = await get_or_create_graph(
+                model_provider=meta["model_provider"],
+                model_name=meta["model_name"],
+                model_routing=meta.get("model_routing")
+            )
+            snapshot = await app_graph.aget_state({"configurable": {"thread_id": thread_id}})
+        except Exception as e:
+            logger.exception(f"[research_resume] Error loading checkpoint | thread_id={thread_id}")
+            raise HTTPException(status_code=500, detail=f"Error loading checkpoint: {str(e)}")
+
+        if not snapshot.values:
+            raise HTTPException(status_code=404, detail="No checkpoint for thread")
+        if not snapshot.next:
+            raise HTTPException(status_code=409, detail="Run already completed")
+
+        api_key = request.api_key if request else None
+        lease = await admit(api_key, meta["depth"], meta["max_iteration"], renew=False)
+    except BaseException:
+        await cancellation_registry.unregister(thread_id)
+        raise
+
+    logger.info(f"[research_resume] Resume stream | thread_id={thread_id} | next={list(snapshot.next)}")
+    return stream_agent_events(
+        thread_id,
+        {'type': 'resumed', 'thread_id': thread_id, 'query': meta["query"], 'next': list(snapshot.next)},
+        run_agent_streaming(
+            thread_id=thread_id,
+            query=meta["query"],
+            max_iteration=meta["max_iteration"],
+            depth=meta["depth"],
+            model_provider=meta["model_provider"],
+            model_name=meta["model_name"],
+            api_key=api_key,
+            model_routing=meta.get("model_routing"),
+            resume=True
+        ),
+        lease,
+        claimed=True
     )
 
 @router.post("/research/cancel/{thread_id}")
 async def cancel_research(thread_id: str):
-    task = running_research_task.get(thread_id)
-    if not task:
+    """Cancel a running stream or async job, whichever process in the cluster runs it"""
+    if not await cancellation_registry.request_cancel(thread_id):
         return JSONResponse(
             status_code=404,
             content={"status": "not_found", "thread_id": thread_id},
         )
-    if task.done():
-        return {"status": "already_finished", "thread_id": thread_id}
-    
-    task.cancel()
+
     logger.info(f"[cancel research] Request Cancellation | thread_id={thread_id}")
     return {"status": "cancelled_requested", "thread_id": thread_id}
 
+@router.get("/research/checkpoints/{thread_id}")
+async def research_checkpoints(thread_id: str):
+    """Checkpoint footprint of a thread (key counts, bytes, remaining TTL) and the compactor's counters"""
+    try:
+        stats = await get_thread_checkpoint_stats(thread_id)
+    except Exception as e:
+        logger.exception(f"[research_checkpoints] Error | thread_id={thread_id}")
+        raise HTTPException(status_code=500, detail=f"Error reading checkpoints: {str(e)}")
+
+    if not stats["checkpoints"]:
+        raise HTTPException(status_code=404, detail="Thread Not Found")
+    return {**stats, "compaction": get_compaction_stats()}
+
+@router.get("/research/admission")
+async def research_admission():
+    """Running and queued research work across the cluster against the admission caps"""
+    try:
+        return await admission.get_admission_stats()
+    except Exception as e:
+        logger.exception("[research_admission] Error")
+        raise HTTPException(status_code=500, detail=f"Error reading admission stats: {str(e)}")
 
+@router.get("/research/stats")
+async def research_stats():
+    """This process's graph and model caches, tool scheduler state, and the search and LLM response caches"""
+    try:
+        return {
+            **get_cached_stats(),
+            "tools": get_tool_scheduler().stats(),
+            "search_cache": await get_search_cache_stats(),
+            "llm_cache": await get_llm_cache_stats(),
+        }
+    except Exception as e:
+        logger.exception("[research_stats] Error")
+        raise HTTPException(status_code=500, detail=f"Error reading stats: {str(e)}")
@@ -1,21 +1,53 @@
 import asyncio
-from app.core.graph import create_graph
+import threading
+from typing import Optional
 from app.core.llm_response_models import ResearchDepth
 from app.services.checkpointer import get_or_create_graph
+from app.services.checkpoint_retention import checkpoint_compactor, compact_for_resume
+from app.services.cache import store_thread_meta
+from app.services.cancellation import cancellation_registry
 from app.utils.logger import logger
-from langgraph.checkpoint.redis import RedisSaver
-from langgraph.checkpoint.memory import MemorySaver
 from uuid import UUID
 
+# The cached graphs, pooled model clients, tool scheduler and the provider SDKs' shared HTTP clients
+# are neither thread-safe nor usable across event loops, so run_agent hands every run to the one
+# loop that owns them: the API's, registered at startup, or in a process without one (scripts)
+# a long-lived background loop started on first use
+app_loop: Optional[asyncio.AbstractEventLoop] = None
+app_loop_lock = threading.Lock()
+
+def set_app_loop(loop: Optional[asyncio.AbstractEventLoop]):
+    global app_loop
+    with app_loop_lock:
+        app_loop = loop
+
+def get_app_loop() -> asyncio.AbstractEventLoop:
+    global app_loop
+    with app_loop_lock:
+        if app_loop is None or app_loop.is_closed():
+            app_loop = asyncio.new_event_loop()
+            threading.Thread(target=app_loop.run_forever, name="run-agent-loop", daemon=True).start()
+        return app_loop
+
 def run_agent(
     thread_id:str, 
     query:str, 
     max_iteration:int=2, 
     depth:str=None, 
     model_provider:str="openai", 
-    model_name:str="gpt-4o-mini"
+    model_name:str="gpt-4o-mini",
+    api_key: str | None = None,
+    model_routing: dict | None = None
 ):
-    
+    """Blocking run; call it from a thread (e.g. `asyncio.to_thread`), never from the app's event loop"""
+    loop = get_app_loop()
+    try:
+        on_app_loop = asyncio.get_running_loop() is loop
+    except RuntimeError:
+        on_app_loop = False
+    if on_app_loop:
+        raise RuntimeError("run_agent would block the event loop it needs; await the graph directly or run it in a thread")
+
     if depth is None:
         research_depth = ResearchDepth.MODERATE
     else: 
@@ -27,11 +59,6 @@ def run_agent(
         research_depth = depth_mapping.get(depth.lower())
 
     try:
-
-        checkpointer = MemorySaver()
-        app = create_graph(checkpointer=checkpointer, model_name=model_name, model_provider=model_provider)
-        
-
         config = {"configurable": {
         "thread_id": str(thread_id)
         }}
@@ -44,7 +71,16 @@ def run_agent(
             "search_results": [],
         }
 
-        result = asyncio.run(app.ainvoke(initial_state, config=config))
+        async def invoke():
+            app = await get_or_create_graph(
+                model_provider=model_provider,
+                model_name=model_name,
+                persistent=False,
+                model_routing=model_routing
+            )
+            return await app.ainvoke(initial_state, config=config, context={"api_key": api_key})
+
+        result = asyncio.run_coroutine_threadsafe(invoke(), loop).result()
         
         return result
     except Exception as e:
@@ -59,9 +95,18 @@ async def run_agent_streaming(
     depth:str=None, 
     model_provider:str="openai", 
     model_name:str="gpt-4o-mini",
-    api_key: str | None = None
+    api_key: str | None = None,
+    model_routing: dict | None = None,
+    resume: bool = False
 ):
-    """Agent with streaming support"""
+    """
+    Agent with streaming support.
+    With `resume=True` the run continues from the thread's latest checkpoint: nodes that
+    already finished (including finished parallel searches of an interrupted step) are skipped
+    and only the remaining work is streamed.
+    The run is registered for cancellation, so /research/cancel stops it from any process.
+    A resume must be claimed first (`cancellation_registry.claim`); the claim is released when the run ends.
+    """
     if depth is None:
         research_depth = ResearchDepth.MODERATE
     else: 
@@ -72,11 +117,12 @@ async def run_agent_streaming(
         }
         research_depth = depth_mapping.get(depth.lower())
 
+    registered = resume
     try:
         app = await get_or_create_graph(
             model_provider=model_provider,
             model_name=model_name,
-            api_key=api_key
+            model_routing=model_routing
         )
         
         config = {"configurable": {
@@ -91,7 +137,28 @@ async def run_agent_streaming(
             "search_results": [],
         }
 
-        async for event in app.astream_events(input=initial_state, config=config, version="v2"):
+        if resume:
+            snapshot = await app.aget_state(config)
+            if not snapshot.next:
+                yield {"type": "error", "message": "Nothing to resume: the thread has no unfinished run"}
+                return
+            logger.info(f"[run_agent_streaming] Resuming | thread_id={thread_id} | next={list(snapshot.next)}")
+            await compact_for_resume(str(thread_id))
+            initial_state = None
+        else:
+            await store_thread_meta(str(thread_id), {
+                "query": query,
+                "max_iteration": max_iteration,
+                "depth": depth,
+                "model_provider": model_provider,
+                "model_name": model_name,
+                "model_routing": model_routing
+            })
+
+        cancellation = await cancellation_registry.register(str(thread_id), asyncio.current_task())
+        registered = True
+
+        async for event in app.astream_events(input=initial_state, config=config, version="v2", context={"api_key": api_key, "cancellation": cancellation}):
             #parse the raw events to get the node names and content
             event_type = event.get('event')
 
@@ -108,9 +175,15 @@ async def run_agent_streaming(
                 if content:
                     yield {"type": "token", "content": content}
 
+        checkpoint_compactor.schedule(str(thread_id))
+
     except asyncio.CancelledError:
         logger.info(f"[run_agent_streaming] Cancelled | thread_id = {thread_id}")
         raise
     
     except Exception as e:
-        yield {"type": "error", "message": str(e)}
\ No newline at end of file
+        yield {"type": "error", "message": str(e)}
+
+    finally:
+        if registered:
+            await cancellation_registry.unregister(str(thread_id))
@@ -0,0 +1,175 @@
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+from app.core.dedup import canonical_url, canonical_keys
+from app.core.llm_response_models import (
+    Citations, CitationIssue, IssueSeverity, NextSteps, QualityAction, QualityCheckOutput,
+    QualityScores, SearchQueryResult, SearchResult, SynthesisOutput
+)
+
+# Characters of source text shown around the best match of a citation's quote
+EVIDENCE_WINDOW_CHARS = 600
+CITATION_MARKER = re.compile(r"\[(\d+)\]")
+# Share of a quote's words found in its source: below SUPPORT_MIN the reviewing model is told to
+# check the quote closely (a paraphrase is not a broken citation), at or above SUPPORT_VERIFIED it
+# counts as mechanically verified
+QUOTE_SUPPORT_MIN = 0.4
+QUOTE_SUPPORT_VERIFIED = 0.8
+# A report is sent back for revision without an LLM review once this share of citations point
+# at sources that do not exist
+PRECHECK_FAIL_SHARE = 0.3
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def index_sources(search_results: List[SearchQueryResult]) -> Dict[str, SearchResult]:
+    """Search results by canonical URL; the first (highest placed) copy wins"""
+    sources = {}
+    for search_result in search_results:
+        for result in search_result.results:
+            for key in canonical_keys(result.url, result.metadata):
+                sources.setdefault(key, result)
+    return sources
+
+def find_source(citation: Citations, sources: Dict[str, SearchResult]) -> Optional[SearchResult]:
+    return sources.get(canonical_url(citation.source_url))
+
+def match_position(quote: str, content: str) -> int:
+    """Offset in `content` where `quote` (or its longest common run) starts"""
+    position = content.find(quote)
+    if position >= 0 or not quote:
+        return max(position, 0)
+    match = SequenceMatcher(None, content, quote, autojunk=False).find_longest_match(0, len(content), 0, len(quote))
+    return max(match.a - match.b, 0)
+
+def evidence_window(quote: str, content: str, window: int = EVIDENCE_WINDOW_CHARS) -> str:
+    """The part of the source text a reviewer needs to check the quote, not the whole snippet"""
+    content = re.sub(r"\s+", " ", content).strip()
+    if len(content) <= window:
+        return content
+    position = match_position(normalize_text(quote), content.lower())
+    start = max(0, min(position - window // 4, len(content) - window))
+    excerpt = content[start:start + window]
+    return f"{'...' if start else ''}{excerpt}{'...' if start + window < len(content) else ''}"
+
+def format_citation_evidence(
+    citations: List[Citations],
+    search_results: List[SearchQueryResult],
+    weak_quotes: Optional[Dict[int, float]] = None
+) -> str:
+    """
+    Compact verification view for the quality checker: per citation only the claim, the quote
+    and the matching window of its source. Results no citation refers to are left out.
+    Quotes the local check could barely find in their source (`weak_quotes`) are pointed out.
+    """
+    sources = index_sources(search_results)
+    blocks = []
+    for citation in citations:
+        source = find_source(citation, sources)
+        evidence = evidence_window(citation.quote, source.content) if source else "(source URL not found in the search results)"
+        block = (
+            f"[{citation.id}] ({citation.source_type.value}, {citation.confidence.value}) {citation.source_url}\n"
+            f"    Claim: {citation.claim}\n"
+            f"    Quote: {citation.quote}\n"
+            f"    Source text: {evidence}"
+        )
+        if weak_quotes and citation.id in weak_quotes:
+            block += f"\n    Local check: only {weak_quotes[citation.id]:.0%} of the quote's words appear in the source; check whether it still supports the claim"
+        blocks.append(block)
+    return "\n\n".join(blocks) or "(no citations)"
+
+
+class CitationPrecheck(BaseModel):
+    """Outcome of the local citation checks"""
+    issues: List[CitationIssue] = Field(default_factory=list)
+    citation_count: int = 0
+    broken_citations: int = 0
+    verified_citations: int = 0
+    # Citation id -> share of the quote's words found in its source, for quotes below QUOTE_SUPPORT_MIN
+    weak_quotes: Dict[int, float] = Field(default_factory=dict)
+
+    @property
+    def clear_fail(self) -> bool:
+        return self.citation_count > 0 and self.broken_citations / self.citation_count >= PRECHECK_FAIL_SHARE
+
+    @property
+    def clear_pass(self) -> bool:
+        return self.citation_count > 0 and not self.issues and not self.weak_quotes and self.verified_citations == self.citation_count
+
+def quote_support(quote: str, content: str) -> float:
+    """Share of the quote's words present in the source; 1.0 for a verbatim quote"""
+    quote, content = normalize_text(quote), normalize_text(content)
+    if not quote or quote in content:
+        return 1.0
+    words = {word for word in re.findall(r"\w+", quote) if len(word) > 2}
+    if not words:
+        return 1.0
+    return len(words & set(re.findall(r"\w+", content))) / len(words)
+
+def precheck_citations(synthesis: SynthesisOutput, search_results: List[SearchQueryResult]) -> CitationPrecheck:
+    """
+    Mechanical checks that need no model: citation URLs must be among the search results and
+    every [n] marker needs a citation entry. Quotes are matched (fuzzily) against their source,
+    but a poor match is only recorded in `weak_quotes` for the reviewing model: a faithful
+    paraphrase or a translated quote matches poorly too.
+    """
+    sources = index_sources(search_results)
+    citation_ids = {citation.id for citation in synthesis.citations}
+    issues = []
+    broken = set()
+    verified = 0
+    weak_quotes = {}
+
+    for citation in synthesis.citations:
+        source = find_source(citation, sources)
+        if source is None:
+            issues.append(CitationIssue(citation_id=citation.id, problem=f"Source URL {citation.source_url} is not in the search results", severity=IssueSeverity.HIGH))
+            broken.add(citation.id)
+            continue
+
+        support = quote_support(citation.quote, source.content)
+        if support < QUOTE_SUPPORT_MIN:
+            weak_quotes[citation.id] = support
+        elif support >= QUOTE_SUPPORT_VERIFIED:
+            verified += 1
+
+    markers = {int(marker) for marker in CITATION_MARKER.findall(synthesis.report)}
+    for marker in sorted(markers - citation_ids):
+        issues.append(CitationIssue(citation_id=marker, problem=f"Marker [{marker}] in the report has no citation entry", severity=IssueSeverity.HIGH))
+        broken.add(marker)
+    for citation_id in sorted(citation_ids - markers):
+        issues.append(CitationIssue(citation_id=citation_id, problem="Citation is never referenced in the report", severity=IssueSeverity.LOW))
+
+    return CitationPrecheck(
+        issues=issues,
+        citation_count=len(citation_ids | markers),
+        broken_citations=len(broken),
+        verified_citations=verified,
+        weak_quotes=weak_quotes
+    )
+
+def precheck_failure(precheck: CitationPrecheck, previous: Optional[QualityCheckOutput]) -> QualityCheckOutput:
+    """
+    Quality check result built from the local issues alone. Coverage and coherence were not
+    assessed, so the previous iteration's scores are carried over (None on the first iteration).
+    """
+    problems = "\n".join(f"- [{issue.citation_id}] {issue.problem}" for issue in precheck.issues if issue.severity != IssueSeverity.LOW)
+    return QualityCheckOutput(
+        passed=False,
+        scores=QualityScores(
+            citation_accuracy=1 - precheck.broken_citations / precheck.citation_count,
+            coverage=previous.scores.coverage if previous else None,
+            coherence=previous.scores.coherence if previous else None
+        ),
+        citation_issues=precheck.issues,
+        coverage_gaps=[],
+        action=QualityAction.REVISE,
+        next_steps=NextSteps(revision_instructions=f"Fix or remove these citations; only cite URLs and text present in the search results:\n{problems}")
+    )
+
+def merge_issues(local: List[CitationIssue], reviewed: List[CitationIssue]) -> List[CitationIssue]:
+    """Local issues first, then the model's issues for citations the local checks did not flag"""
+    flagged = {issue.citation_id for issue in local}
+    return local + [issue for issue in reviewed if issue.citation_id not in flagged]
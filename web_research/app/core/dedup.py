@@ -0,0 +1,154 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, unquote
+from app.core.llm_response_models import SearchQueryResult, SearchResult
+
+# Query parameters that never change what a page is: exact names, plus the utm_* family
+TRACKING_PARAMS = {"ref", "fbclid", "gclid"}
+TRACKING_PARAM_PREFIXES = ("utm_",)
+ARXIV_ID = re.compile(r"arxiv\.org/(?:abs|pdf)/([^?#]+?)(?:v\d+)?(?:\.pdf)?/?$", re.IGNORECASE)
+
+SIMHASH_BITS = 64
+# Fingerprints this many bits apart or closer are treated as the same text
+# (looser than the usual 3 for whole pages, since snippets have few shingles)
+SIMHASH_MAX_DISTANCE = 6
+# Shorter snippets share too much boilerplate for a fingerprint match to mean anything
+SIMHASH_MIN_WORDS = 20
+SHINGLE_SIZE = 3
+
+
+def canonical_url(url: str, metadata: Optional[dict] = None) -> str:
+    """
+    Identity of a source regardless of how a tool spelled its URL:
+    arXiv papers by id without version, Wikipedia articles by pageid or title,
+    everything else by host and path without tracking parameters.
+    """
+    metadata = metadata or {}
+    match = ARXIV_ID.search(url or "")
+    if match:
+        return f"arxiv:{match.group(1).lower()}"
+
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower().removeprefix("www.").replace(".m.wikipedia.org", ".wikipedia.org")
+    if host.endswith("wikipedia.org"):
+        if metadata.get("pageid"):
+            return f"wikipedia:{metadata['pageid']}"
+        title = unquote(parts.path.removeprefix("/wiki/")).replace(" ", "_").lower()
+        return f"wikipedia:{host}:{title}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def canonical_keys(url: str, metadata: Optional[dict] = None) -> List[str]:
+    """Every identity of a source: a Wikipedia page is known by pageid and by title URL"""
+    keys = [canonical_url(url, metadata)]
+    if metadata and metadata.get("pageid"):
+        keys.append(canonical_url(url))
+    return keys
+
+
+@lru_cache(maxsize=4096)
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word shingles; None when the text is too short to fingerprint.
+    Cached because the reducer re-indexes the kept results on every merge.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SIMHASH_MIN_WORDS:
+        return None
+
+    weights = [0] * SIMHASH_BITS
+    for i in range(len(words) - SHINGLE_SIZE + 1):
+        shingle = " ".join(words[i:i + SHINGLE_SIZE])
+        digest = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def is_near_duplicate(a: Optional[int], b: Optional[int]) -> bool:
+    return a is not None and b is not None and bin(a ^ b).count("1") <= SIMHASH_MAX_DISTANCE
+
+
+def merge_result(kept: SearchResult, duplicate: SearchResult) -> SearchResult:
+    """Best score, longest content and the union of metadata; the kept result's URL and title win"""
+    scores = [score for score in (kept.score, duplicate.score) if score is not None]
+    longer = duplicate if len(duplicate.content) > len(kept.content) else kept
+    return kept.model_copy(update={
+        "score": max(scores) if scores else None,
+        "content": longer.content,
+        "raw_content": kept.raw_content or duplicate.raw_content,
+        "date": kept.date or duplicate.date,
+        "metadata": {**duplicate.metadata, **kept.metadata},
+    })
+
+
+class ResultIndex:
+    """Lookup of already kept results by canonical URL and by content fingerprint"""
+
+    def __init__(self):
+        self.by_url: Dict[str, Tuple[int, int]] = {}
+        self.fingerprints: List[Tuple[int, Tuple[int, int]]] = []
+
+    def find(self, url_keys: List[str], fingerprint: Optional[int]) -> Optional[Tuple[int, int]]:
+        for url_key in url_keys:
+            if url_key in self.by_url:
+                return self.by_url[url_key]
+        if fingerprint is not None:
+            for other, position in self.fingerprints:
+                if is_near_duplicate(fingerprint, other):
+                    return position
+        return None
+
+    def add(self, url_keys: List[str], fingerprint: Optional[int], position: Tuple[int, int]):
+        for url_key in url_keys:
+            self.by_url.setdefault(url_key, position)
+        if fingerprint is not None:
+            self.fingerprints.append((fingerprint, position))
+
+
+def dedupe_search_results(
+    existing: List[SearchQueryResult],
+    new: List[SearchQueryResult]
+) -> List[SearchQueryResult]:
+    """
+    Append `new` to `existing`, folding every new result that repeats a kept one
+    (same canonical URL or near-identical content) into that kept result.
+    Kept results never move, so citation ids (flattened positions) stay stable;
+    groups left empty by deduplication are not appended.
+    """
+    merged = [group.model_copy(update={"results": list(group.results)}) for group in existing]
+    index = ResultIndex()
+    for group_index, group in enumerate(merged):
+        for result_index, result in enumerate(group.results):
+            index.add(canonical_keys(result.url, result.metadata), simhash(result.content), (group_index, result_index))
+
+    for group in new:
+        group_index = len(merged)
+        unique = []
+        for result in group.results:
+            url_keys = canonical_keys(result.url, result.metadata)
+            fingerprint = simhash(result.content)
+            position = index.find(url_keys, fingerprint)
+
+            if position is None:
+                index.add(url_keys, fingerprint, (group_index, len(unique)))
+                unique.append(result)
+            elif position[0] == group_index:
+                unique[position[1]] = merge_result(unique[position[1]], result)
+            else:
+                kept_group = merged[position[0]]
+                kept_group.results[position[1]] = merge_result(kept_group.results[position[1]], result)
+
+        if unique:
+            merged.append(group.model_copy(update={"results": unique}))
+
+    return merged
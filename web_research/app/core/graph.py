@@ -1,42 +1,291 @@
-from langgraph.graph import StateGraph, END
-from typing import Optional
-from app.core.state_graph import ResearchState
+from langgraph.graph import StateGraph, START, END
+from langgraph.runtime import Runtime
+from pydantic import ValidationError
+from typing import Dict, List, Optional, Tuple
+from app.core.state_graph import ResearchState, ResearchContext
 from app.core.prompts.planner_prompt import QUERY_PLANNER_PROMPT
-from app.core.prompts.synthesis_citation_prompt import SYNTHESIS_PROMPT
-from app.core.prompts.quality_check_prompt import QUALITY_CHECK_PROMPT
-from app.core.llm_response_models import QueryPlanOutput, SynthesisOutput, QualityCheckOutput, SearchQueryResult, QualityAction, ResearchTool
-from app.core.llm import get_llm
-from app.core.utils import get_source_type, parse_tool_results, format_search_results
-from app.core.tools.arxiv_search import arxiv_search
-from app.core.tools.wikipedia_search import wikipedia_search
-from app.core.tools.tavily_search import tavily_search_tool
+from app.core.prompts.synthesis_citation_prompt import SYNTHESIS_PROMPT, INCREMENTAL_SYNTHESIS_PROMPT, REVISION_SUFFIX
+from app.core.prompts.quality_check_prompt import QUALITY_CHECK_PROMPT, CITATIONS_VERIFIED_NOTE
+from app.core.llm_response_models import QueryPlanOutput, PlannedQuery, SynthesisOutput, SynthesisPatch, QualityCheckOutput, SearchQueryResult, SkippedSearch, QualityAction, ResearchTool, ResearchDepth, ROUTED_NODES
+from app.core.llm import PROVIDER_CHAT_MODEL, get_structured_llm, get_streaming_structured_llm
+from app.core.citation_check import format_citation_evidence, precheck_citations, precheck_failure, merge_issues
+from app.core.quality_gate import score_report, heuristic_failure, is_decisive
+from app.core.dedup import dedupe_search_results
+from app.core.incremental_synthesis import apply_synthesis_patch, report_outline, citation_summary, next_citation_id
+from app.core.utils import get_source_type, parse_tool_results, format_search_results, get_context_token_budget
+from app.core.tools.registry import TOOL_FUNCTIONS
+from app.core.tools.scheduler import get_tool_scheduler, CircuitOpenError, ToolQueueTimeoutError, ToolTimeoutError
+from app.services.search_cache import cached_search, normalize_query
+from app.services.llm_cache import cached_llm_call
+from app.services.blob_store import store_search_results, load_search_results
+from app.services.cancellation import CancellationToken
+from app.utils.config import get_settings
 from app.utils.logger import logger
 import asyncio
 
-TOOL_FUNCTIONS = {
-    ResearchTool.TAVILY: tavily_search_tool,
-    ResearchTool.WIKIPEDIA: wikipedia_search,
-    ResearchTool.ARXIV: arxiv_search,
+SEARCH_MAX_RESULTS = 5
+# Tools queried with the raw research query while the planner runs (SPECULATIVE_SEARCH)
+SPECULATIVE_TOOLS = [ResearchTool.WIKIPEDIA, ResearchTool.TAVILY]
+QUERY_STOPWORDS = {"a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "what", "how", "why", "does", "do"}
+# Wall-clock budget in seconds for one search_gather pass when partial results are enabled
+SEARCH_TIME_BUDGET = {
+    ResearchDepth.SHALLOW: 15.0,
+    ResearchDepth.MODERATE: 30.0,
+    ResearchDepth.DEEP: 60.0,
 }
 
+def get_search_key(query: str, tool_name: ResearchTool) -> str:
+    """
+    Identity of one (query, tool) search, used to avoid running it twice in a thread.
+    Equivalent phrasings (case, punctuation, word order, stopwords) share a key.
+    """
+    terms = sorted({term for term in normalize_query(query).split() if term not in QUERY_STOPWORDS})
+    return f"{tool_name.value}:{' '.join(terms)}"
+
+def get_cancellation(runtime: Optional[Runtime[ResearchContext]]) -> Optional[CancellationToken]:
+    return ((runtime.context if runtime else None) or {}).get("cancellation")
+
+async def check_cancelled(runtime: Optional[Runtime[ResearchContext]]):
+    """Raise CancelledError if the run was cancelled anywhere in the cluster"""
+    token = get_cancellation(runtime)
+    if token is not None:
+        await token.check()
+
+async def execute_search(query: str, tool_name: ResearchTool, cancellation: Optional[CancellationToken] = None):
+    """Run one search through the cache and the tool scheduler; failures come back as SkippedSearch"""
+    if tool_name not in TOOL_FUNCTIONS:
+        return SkippedSearch(query=query, tool=tool_name, reason="unknown_tool")
+    if cancellation is not None:
+        await cancellation.check()
+
+    scheduler = get_tool_scheduler()
+    try:
+        raw_results = await cached_search(
+            tool_name,
+            query,
+            SEARCH_MAX_RESULTS,
+            lambda: scheduler.run(tool_name, query, SEARCH_MAX_RESULTS)
+        )
+
+        return SearchQueryResult(
+            query=query,
+            tool=tool_name,
+            source_type=get_source_type(tool_name),
+            results=parse_tool_results(raw_results, tool_name)
+        )
+
+    except CircuitOpenError:
+        logger.warning(f"[search_gather] Skipped, circuit open | tool={tool_name.value} | query={query!r}")
+        return SkippedSearch(query=query, tool=tool_name, reason="circuit_open")
+
+    except ToolTimeoutError:
+        logger.warning(f"[search_gather] Timed out | tool={tool_name.value} | query={query!r}")
+        return SkippedSearch(query=query, tool=tool_name, reason="timeout")
+
+    except ToolQueueTimeoutError:
+        logger.warning(f"[search_gather] Skipped, tool saturated | tool={tool_name.value} | query={query!r}")
+        return SkippedSearch(query=query, tool=tool_name, reason="queue_timeout")
+
+    except Exception as e:
+        logger.warning(f"[search_gather] Search failed | tool={tool_name.value} | query={query!r} | {e}")
+        return SkippedSearch(query=query, tool=tool_name, reason=f"error: {e}")
+
+def resolve_model_routing(
+    model_provider: str,
+    model_name: str,
+    model_routing: Optional[Dict[str, str]] = None
+) -> Dict[str, Tuple[str, str]]:
+    """
+    (provider, model) per routed node. Routing values are "provider/model", or just "model"
+    for the request's provider; nodes not in the map use the request's model.
+    The part before the first "/" is only taken as the provider when it is a known one, so
+    model names that contain a slash (e.g. "meta-llama/Llama-3.1-8B") stay whole.
+    """
+    node_models = {node: (model_provider, model_name) for node in ROUTED_NODES}
+    for node, target in (model_routing or {}).items():
+        if node not in node_models:
+            raise ValueError(f"Unknown node '{node}' in model routing; expected one of {', '.join(ROUTED_NODES)}")
+        provider, _, routed_model = target.partition("/")
+        if provider not in PROVIDER_CHAT_MODEL or not routed_model:
+            provider, routed_model = model_provider, target
+        node_models[node] = (provider, routed_model)
+    return node_models
+
+async def load_state_results(state: ResearchState, missing: Optional[List[str]] = None) -> List[SearchQueryResult]:
+    """
+    Search results for the nodes that read them: loaded from the blob store, overlapping sources folded.
+    Digests of blobs that could not be loaded are appended to `missing` when given.
+    """
+    return dedupe_search_results([], await load_search_results(state.get('search_results') or [], missing))
+
+async def gather_within_budget(tasks, pairs, budget: float):
+    """Like gather, but searches still running when the budget runs out are cancelled and reported as skipped"""
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    if pending:
+        logger.info(f"[search_gather] Time budget of {budget}s exhausted | returning {len(done)}/{len(tasks)} searches")
+
+    results = []
+    for task, (query, tool_name) in zip(tasks, pairs):
+        if task in done:
+            results.append(task.result())
+        else:
+            results.append(SkippedSearch(query=query, tool=tool_name, reason="time_budget"))
+    return results
+
+async def collect_searches(tasks, pairs, depth: Optional[ResearchDepth]) -> dict:
+    """Wait for started search tasks and split them into the state updates for results and skips"""
+    if not tasks:
+        return {"search_results": [], "skipped_searches": [], "executed_searches": []}
+
+    try:
+        if get_settings().search_partial_results:
+            budget = SEARCH_TIME_BUDGET.get(depth, SEARCH_TIME_BUDGET[ResearchDepth.MODERATE])
+            results = await gather_within_budget(tasks, pairs, budget)
+        else:
+            results = await asyncio.gather(*tasks)
+    except BaseException:
+        # A cancelled run must not leave its tool calls running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    all_results = [result for result in results if isinstance(result, SearchQueryResult)]
+    skipped = [result for result in results if isinstance(result, SkippedSearch)]
+    return {
+        "search_results": await store_search_results(all_results),
+        "skipped_searches": skipped,
+        # Skipped searches are not recorded, so a later pass may try them again
+        "executed_searches": [get_search_key(result.query, result.tool) for result in all_results],
+    }
+
 class ResearchGraph:
-    def __init__(self, model):
-        self.planner_model = model.with_structured_output(QueryPlanOutput)
-        self.synthesis_model = model.with_structured_output(SynthesisOutput)
-        self.quality_model = model.with_structured_output(QualityCheckOutput)
-        self.base_model = model
-    
-    async def planner(self, state: ResearchState) -> ResearchState:
+    def __init__(
+        self,
+        model_provider: str,
+        model_name: str,
+        api_key: Optional[str] = None,
+        model_routing: Optional[Dict[str, str]] = None
+    ):
+        self.model_provider = model_provider
+        self.model_name = model_name
+        self.default_api_key = api_key
+        self.node_models = resolve_model_routing(model_provider, model_name, model_routing)
+
+    def node_api_key(self, node: str, runtime: Optional[Runtime[ResearchContext]]) -> Optional[str]:
+        """The per-run API key belongs to the request's provider; nodes routed elsewhere use their own config"""
+        if self.node_models[node][0] != self.model_provider:
+            return None
+        context = (runtime.context if runtime else None) or {}
+        return context.get("api_key") or self.default_api_key
+
+    def structured_model(self, schema: type, runtime: Optional[Runtime[ResearchContext]], node: str = "synthesis"):
+        """Pooled structured-output model for a node, using the API key bound to this invocation if there is one"""
+        provider, model_name = self.node_models[node]
+        return get_structured_llm(provider, model_name, schema, self.node_api_key(node, runtime))
+
+    def streaming_model(self, schema: type, runtime: Optional[Runtime[ResearchContext]], node: str = "planner"):
+        """Like `structured_model`, but streams partial dicts of the schema while it is generated"""
+        provider, model_name = self.node_models[node]
+        return get_streaming_structured_llm(provider, model_name, schema, self.node_api_key(node, runtime))
+
+    async def invoke_structured(self, node: str, schema: type, prompt: str, runtime: Optional[Runtime[ResearchContext]], **similarity):
+        """Structured model call behind the LLM response cache (see `cached_llm_call`)"""
+        await check_cancelled(runtime)
+        provider, model_name = self.node_models[node]
+        return await cached_llm_call(
+            node,
+            provider,
+            model_name,
+            schema,
+            prompt,
+            lambda: self.structured_model(schema, runtime, node).ainvoke([prompt]),
+            **similarity
+        )
+
+    async def planner(self, state: ResearchState, runtime: Runtime[ResearchContext]) -> ResearchState:
         """Plans the Research Steps given the user query and search depth"""
         
         prompt = QUERY_PLANNER_PROMPT.format(query=state['original_query'], depth=state['depth'])
-        response = await self.planner_model.ainvoke([prompt])
+        if get_settings().streaming_planner:
+            return await self.streaming_planner(state, runtime, prompt)
+
+        response = await self.invoke_structured(
+            "planner", QueryPlanOutput, prompt, runtime,
+            similarity_text=state['original_query'],
+            similarity_scope=str(state['depth'])
+        )
         
         return {"search_plan": response}
 
+    async def streaming_planner(self, state: ResearchState, runtime: Runtime[ResearchContext], prompt: str) -> ResearchState:
+        """
+        Stream the plan and start each planned query's searches as soon as the query is complete,
+        so searching overlaps with plan generation. search_gather skips whatever ran here.
+        A cached plan starts nothing; search_gather then runs it as usual.
+        Searches already run in this thread, or run by speculative_search in parallel with this
+        node, are not started again.
+        """
+        tasks, pairs = [], []
+        launched = set(state.get('executed_searches') or [])
+        if get_settings().speculative_search:
+            launched.update(get_search_key(state['original_query'], tool_name) for tool_name in SPECULATIVE_TOOLS)
+        cancellation = get_cancellation(runtime)
+        await check_cancelled(runtime)
+
+        def launch(planned_query: PlannedQuery):
+            for tool_name in planned_query.tools:
+                search_key = get_search_key(planned_query.query, tool_name)
+                if search_key in launched:
+                    continue
+                launched.add(search_key)
+                pairs.append((planned_query.query, tool_name))
+                tasks.append(asyncio.create_task(execute_search(planned_query.query, tool_name, cancellation)))
+                logger.info(f"[planner] Search started while planning | tool={tool_name.value} | query={planned_query.query!r}")
+
+        def launch_entry(entry: dict):
+            try:
+                launch(PlannedQuery.model_validate(entry))
+            except ValidationError:
+                # Left to search_gather, which runs the validated plan
+                pass
+
+        async def stream_plan() -> QueryPlanOutput:
+            partial = {}
+            completed = 0
+            async for partial in self.streaming_model(QueryPlanOutput, runtime).astream([prompt]):
+                queries = (partial or {}).get("queries") or []
+                # Every entry but the last is final; the last may still be receiving tools
+                for entry in queries[completed:-1]:
+                    launch_entry(entry)
+                completed = max(completed, len(queries) - 1)
+
+            plan = QueryPlanOutput.model_validate(partial)
+            for planned_query in plan.queries[completed:]:
+                launch(planned_query)
+            return plan
+
+        try:
+            response = await cached_llm_call(
+                "planner", *self.node_models["planner"], QueryPlanOutput, prompt, stream_plan,
+                similarity_text=state['original_query'],
+                similarity_scope=str(state['depth'])
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return {"search_plan": response, **await collect_searches(tasks, pairs, state.get('depth'))}
+
     @staticmethod
-    async def search_gather(state: ResearchState) -> ResearchState:
-        """Execute searches based on plan or additional queries""" 
+    async def search_gather(state: ResearchState, runtime: Runtime[ResearchContext]) -> ResearchState:
+        """Execute searches based on plan or additional queries, except those already run in this thread""" 
         
         if state.get('quality_check') and state['quality_check'].next_steps and state['quality_check'].next_steps.additional_queries:
             queries_to_execute = state["quality_check"].next_steps.additional_queries
@@ -44,70 +293,134 @@ class ResearchGraph:
         else:
             queries_to_execute = state['search_plan'].queries    
 
-        all_results = []
-
-        async def execute_search(planned_query, tool_name):
-            try:
-                if tool_name not in TOOL_FUNCTIONS:
-                    return None
-                
-                loop = asyncio.get_event_loop()
-                raw_results = await loop.run_in_executor(None, TOOL_FUNCTIONS[tool_name], planned_query.query)
-
-                search_results = SearchQueryResult(
-                    query=planned_query.query,
-                    tool=tool_name,
-                    source_type=get_source_type(tool_name),
-                    results=parse_tool_results(raw_results, tool_name)
-                )
-                return search_results
-            
-            except Exception as e:   
-                return None
-            
-        tasks = []
+        executed = set(state.get('executed_searches') or [])
+        pairs = []
         for planned_query in queries_to_execute:
             for tool_name in planned_query.tools:
-                tasks.append(execute_search(planned_query, tool_name))
+                search_key = get_search_key(planned_query.query, tool_name)
+                if search_key not in executed:
+                    executed.add(search_key)
+                    pairs.append((planned_query.query, tool_name))
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        all_results = [result for result in results if result is not None]
+        cancellation = get_cancellation(runtime)
+        tasks = [asyncio.create_task(execute_search(query, tool_name, cancellation)) for query, tool_name in pairs]
+        return await collect_searches(tasks, pairs, state.get('depth'))
 
-        return {"search_results": all_results}
+    @staticmethod
+    async def speculative_search(state: ResearchState, runtime: Runtime[ResearchContext]) -> ResearchState:
+        """
+        Overview search of the raw research query, run alongside the planner. Its searches are
+        recorded in executed_searches, so an equivalent planned query reuses them.
+        """
+        pairs = [(state['original_query'], tool_name) for tool_name in SPECULATIVE_TOOLS]
+        cancellation = get_cancellation(runtime)
+        tasks = [asyncio.create_task(execute_search(query, tool_name, cancellation)) for query, tool_name in pairs]
+        return await collect_searches(tasks, pairs, state.get('depth'))
 
-    async def synthesis_cite(self, state: ResearchState) -> ResearchState:
+    async def synthesis_cite(self, state: ResearchState, runtime: Runtime[ResearchContext]) -> ResearchState:
         """Synthesize the report with proper citations"""
         original_query = state['original_query']
-        search_results = state['search_results']
-        formatted_results = format_search_results(search_results)
+        missing = []
+        search_results = await load_state_results(state, missing)
+        synthesized = state.get('synthesized_search_count') or 0
+
+        # A lost blob shifts every later source, so the existing report's numbering no longer holds
+        if missing and state.get('synthesis'):
+            logger.warning(f"[synthesis_cite] {len(missing)} search result blob(s) missing, rewriting the report in full")
+        elif state.get('synthesis') and 0 < synthesized < len(search_results) and get_settings().incremental_synthesis:
+            return await self.extend_synthesis(state, runtime, search_results)
+
+        formatted_results = format_search_results(
+            search_results,
+            token_budget=get_context_token_budget(self.node_models['synthesis'][1]),
+            query=original_query
+        )
         
         prompt = SYNTHESIS_PROMPT.format(original_query=original_query, search_results=formatted_results)
+        quality_check = state.get('quality_check')
+        if quality_check and quality_check.action == QualityAction.REVISE and quality_check.next_steps and quality_check.next_steps.revision_instructions:
+            prompt += REVISION_SUFFIX.format(revision_instructions=quality_check.next_steps.revision_instructions)
         
-        response = await self.synthesis_model.ainvoke([prompt])
+        response = await self.invoke_structured("synthesis", SynthesisOutput, prompt, runtime)
         
-        return {"synthesis": response}
+        return {"synthesis": response, "synthesized_search_count": len(search_results)}
+
+    async def extend_synthesis(
+        self,
+        state: ResearchState,
+        runtime: Runtime[ResearchContext],
+        search_results: List[SearchQueryResult]
+    ) -> ResearchState:
+        """Incremental synthesis: write only the sections the new results add, then merge them locally"""
+        synthesis = state['synthesis']
+        synthesized = state['synthesized_search_count']
+        new_results = search_results[synthesized:]
+        quality_check = state.get('quality_check')
+        next_steps = quality_check.next_steps if quality_check else None
+
+        formatted_results = format_search_results(
+            new_results,
+            token_budget=get_context_token_budget(self.node_models['synthesis'][1]),
+            query=state['original_query'],
+            first_id=sum(len(search_result.results) for search_result in search_results[:synthesized]) + 1
+        )
+        prompt = INCREMENTAL_SYNTHESIS_PROMPT.format(
+            original_query=state['original_query'],
+            coverage_gaps="\n".join(f"- {gap}" for gap in quality_check.coverage_gaps) if quality_check and quality_check.coverage_gaps else "(none listed)",
+            revision_instructions=(next_steps.revision_instructions if next_steps else None) or "(none)",
+            outline=report_outline(synthesis.report),
+            existing_citations=citation_summary(synthesis.citations),
+            next_citation_id=next_citation_id(synthesis.citations),
+            search_results=formatted_results
+        )
+
+        patch = await self.invoke_structured("synthesis", SynthesisPatch, prompt, runtime)
+        logger.info(f"[synthesis_cite] Incremental | new_searches={len(new_results)} | sections={len(patch.new_sections)} | citations={len(patch.new_citations)}")
+
+        return {"synthesis": apply_synthesis_patch(synthesis, patch), "synthesized_search_count": len(search_results)}
 
-    async def quality_checker(self, state: ResearchState) -> ResearchState:
+    async def quality_checker(self, state: ResearchState, runtime: Runtime[ResearchContext]) -> ResearchState:
         """Check the quality of the generated report"""
         
         original_query = state['original_query']
         report = state['synthesis'].report
         citations = state['synthesis'].citations
-        search_results = state['search_results']
+        search_results = await load_state_results(state)
         current_iteration = state['iteration_count']
         max_iterations = state['max_iterations']
         
-        prompt = QUALITY_CHECK_PROMPT.format(
-            current_iteration = current_iteration,
-            max_iterations = max_iterations,
-            original_query=original_query, 
-            report=report, 
-            citations=citations, 
-            search_results=search_results
-        )
+        settings = get_settings()
+        precheck = precheck_citations(state['synthesis'], search_results) if settings.citation_precheck else None
+        heuristics = None
+        if settings.quality_gate_heuristics and state.get('search_plan'):
+            heuristics = score_report(report, state['search_plan'].queries, state.get('depth'))
 
-        
-        response = await self.quality_model.ainvoke([prompt])
+        if precheck and precheck.clear_fail:
+            # Broken citations alone warrant a revision; no need to pay for a review
+            logger.info(f"[quality_checker] Local precheck failed | broken={precheck.broken_citations}/{precheck.citation_count} | skipping LLM review")
+            response = precheck_failure(precheck, state.get('quality_check'))
+        elif heuristics and heuristics.clear_fail:
+            logger.info(f"[quality_checker] Heuristics failed | density={heuristics.citation_density:.2f} | coverage={heuristics.topic_coverage:.2f} | length={heuristics.length_ratio:.2f} | skipping LLM review")
+            response = heuristic_failure(heuristics, state.get('quality_check'))
+        else:
+            if precheck and precheck.clear_pass:
+                citation_evidence = CITATIONS_VERIFIED_NOTE.format(count=precheck.citation_count)
+            else:
+                citation_evidence = format_citation_evidence(citations, search_results, precheck.weak_quotes if precheck else None)
+
+            prompt = QUALITY_CHECK_PROMPT.format(
+                current_iteration = current_iteration,
+                max_iterations = max_iterations,
+                original_query=original_query, 
+                report=report, 
+                citation_evidence=citation_evidence
+            )
+            
+            response = await self.gate_model_check(prompt) if settings.quality_gate_model else None
+            if response is None:
+                response = await self.invoke_structured("quality", QualityCheckOutput, prompt, runtime)
+            if precheck and precheck.issues:
+                response = response.model_copy(update={"citation_issues": merge_issues(precheck.issues, response.citation_issues)})
 
         return {
             "quality_check": response,
@@ -116,6 +429,28 @@ class ResearchGraph:
             "action": response.action
         }
 
+    async def gate_model_check(self, prompt: str) -> Optional[QualityCheckOutput]:
+        """
+        Quality check on the small gate model (QUALITY_GATE_PROVIDER/QUALITY_GATE_MODEL).
+        Returns None when its verdict is borderline or it fails, so the main model decides.
+        """
+        settings = get_settings()
+        provider, model_name = settings.quality_gate_provider, settings.quality_gate_model
+        try:
+            check = await cached_llm_call(
+                "quality", provider, model_name, QualityCheckOutput, prompt,
+                lambda: get_structured_llm(provider, model_name, QualityCheckOutput).ainvoke([prompt])
+            )
+        except Exception as e:
+            logger.warning(f"[quality_checker] Gate model failed, escalating | model={provider}/{model_name} | {e}")
+            return None
+
+        if is_decisive(check, settings.quality_gate_pass_score, settings.quality_gate_fail_score):
+            logger.info(f"[quality_checker] Gate model decided | model={provider}/{model_name} | passed={check.passed}")
+            return check
+        logger.info(f"[quality_checker] Borderline, escalating to main model | gate_scores={check.scores.model_dump()}")
+        return None
+
     @staticmethod
     def quality_router(state: ResearchState):
         """Router to route the flow from Quality Checker node to either search_gather or synthesis_cite node or END"""
@@ -143,14 +478,20 @@ def create_graph(
     checkpointer=None,
     model_provider: str = "openai",
     model_name: str = 'gpt-4o-mini',
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    model_routing: Optional[Dict[str, str]] = None
 ):
-    model = get_llm(provider=model_provider, model_name=model_name, api_key=api_key)
-    logger.info(f"Loaded model: {model_provider}/{model_name}")
+    """
+    Build the research graph for a provider/model. Model clients come from the shared pool in
+    `app.core.llm` and are resolved per node call, so the compiled graph holds no API key:
+    pass one per run with `context={"api_key": ...}`. `api_key` here is only a fallback default.
+    `model_routing` overrides the model per node, e.g. {"planner": "ollama/qwen2.5", "quality": "gpt-4o-mini"}.
+    """
+    logger.info(f"Configured model: {model_provider}/{model_name} | routing={model_routing or {}}")
 
-    rg = ResearchGraph(model)
+    rg = ResearchGraph(model_provider, model_name, api_key, model_routing)
     
-    graph = StateGraph(ResearchState)
+    graph = StateGraph(ResearchState, context_schema=ResearchContext)
 
     graph.add_node("planner", rg.planner)
     graph.add_node("search_gather", ResearchGraph.search_gather)
@@ -158,7 +499,13 @@ def create_graph(
     graph.add_node("quality_checker", rg.quality_checker)
 
     graph.set_entry_point("planner")
-    graph.add_edge("planner", "search_gather")
+    if get_settings().speculative_search:
+        # Both branches start together; search_gather waits for the plan and the overview results
+        graph.add_node("speculative_search", ResearchGraph.speculative_search)
+        graph.add_edge(START, "speculative_search")
+        graph.add_edge(["planner", "speculative_search"], "search_gather")
+    else:
+        graph.add_edge("planner", "search_gather")
     graph.add_edge("search_gather", "synthesis_cite")
     graph.add_edge("synthesis_cite", "quality_checker")
     graph.add_conditional_edges(
@@ -0,0 +1,92 @@
+import re
+from collections import Counter
+from typing import Dict, List
+from app.core.llm_response_models import SynthesisOutput, SynthesisPatch, SynthesisMetadata, SourceCount, Citations
+
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*$", re.MULTILINE)
+CITATION_MARKER = re.compile(r"\[(\d+)\]")
+# New sections go in front of the first closing section, if the report has one
+CLOSING_HEADINGS = ("conclusion", "summary", "final thoughts", "references")
+
+
+def report_outline(report: str) -> str:
+    """Headings of the report, indented by level"""
+    lines = [f"{'  ' * (len(marks) - 1)}- {title}" for marks, title in HEADING.findall(report)]
+    return "\n".join(lines) or "(no headings)"
+
+def citation_summary(citations: List[Citations]) -> str:
+    return "\n".join(f"[{citation.id}] {citation.claim}" for citation in citations) or "(none)"
+
+def next_citation_id(citations: List[Citations]) -> int:
+    return max((citation.id for citation in citations), default=0) + 1
+
+def renumber_patch(synthesis: SynthesisOutput, patch: SynthesisPatch) -> Dict[int, int]:
+    """
+    Map the patch's citation ids onto fresh ids after the existing ones.
+    A new citation to a URL already cited keeps the existing id instead.
+    """
+    existing_by_url = {citation.source_url: citation.id for citation in synthesis.citations}
+    mapping = {}
+    next_id = next_citation_id(synthesis.citations)
+    for citation in patch.new_citations:
+        if citation.id in mapping:
+            continue
+        if citation.source_url in existing_by_url:
+            mapping[citation.id] = existing_by_url[citation.source_url]
+        else:
+            mapping[citation.id] = next_id
+            next_id += 1
+    return mapping
+
+def insert_sections(report: str, sections: str, level: int) -> str:
+    for match in HEADING.finditer(report):
+        if len(match.group(1)) == level and match.group(2).lower().startswith(CLOSING_HEADINGS):
+            return f"{report[:match.start()]}{sections}\n\n{report[match.start():]}"
+    return f"{report.rstrip()}\n\n{sections}"
+
+def section_level(report: str) -> int:
+    """Heading level of the report's main sections (the most common level below the title)"""
+    levels = Counter(len(marks) for marks, _ in HEADING.findall(report) if len(marks) > 1)
+    return levels.most_common(1)[0][0] if levels else 2
+
+def build_metadata(report: str, citations: List[Citations], self_assesment: str) -> SynthesisMetadata:
+    urls = {citation.source_url: citation.source_type.value for citation in citations}
+    breakdown = Counter(urls.values())
+    return SynthesisMetadata(
+        word_count=len(report.split()),
+        num_sources=len(urls),
+        source_breakdown=[SourceCount(source_type=source_type, count=count) for source_type, count in breakdown.items()],
+        self_assesment=self_assesment
+    )
+
+def apply_synthesis_patch(synthesis: SynthesisOutput, patch: SynthesisPatch) -> SynthesisOutput:
+    """
+    Merge a patch into the report without another model call: citation ids are renumbered
+    after the existing ones, new sections are placed before the closing section, and the
+    metadata is recomputed from the merged report.
+    """
+    mapping = renumber_patch(synthesis, patch)
+
+    def renumber(text: str) -> str:
+        return CITATION_MARKER.sub(lambda m: f"[{mapping.get(int(m.group(1)), int(m.group(1)))}]", text)
+
+    level = section_level(synthesis.report)
+    sections = "\n\n".join(
+        f"{'#' * level} {section.heading.lstrip('# ').strip()}\n\n{renumber(section.content).strip()}"
+        for section in patch.new_sections
+    )
+    report = insert_sections(synthesis.report, sections, level) if sections else synthesis.report
+
+    existing_ids = {citation.id for citation in synthesis.citations}
+    citations = list(synthesis.citations)
+    for citation in patch.new_citations:
+        new_id = mapping[citation.id]
+        if new_id not in existing_ids:
+            citations.append(citation.model_copy(update={"id": new_id}))
+            existing_ids.add(new_id)
+
+    return SynthesisOutput(
+        report=report,
+        citations=citations,
+        metadata=build_metadata(report, citations, patch.self_assesment)
+    )
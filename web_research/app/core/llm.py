@@ -3,8 +3,14 @@ from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers.openai_tools import JsonOutputKeyToolsParser
+from langchain_core.runnables import Runnable
 from app.utils.logger import logger
 from app.utils.config import get_settings
+from app.utils.resource_cache import ResourceCache
+import asyncio
+import hashlib
+import time
 
 PROVIDER_CHAT_MODEL = {
     "ollama": ChatOllama,
@@ -13,6 +19,9 @@ PROVIDER_CHAT_MODEL = {
     "google": ChatGoogleGenerativeAI
 }
 
+# An evicted model may still be serving a request that fetched it just before eviction
+MODEL_CLOSE_GRACE_SECONDS = 300
+
 def get_llm(
     provider: str='openai', 
     model_name: str='gpt-4o-mini', 
@@ -69,5 +78,102 @@ def get_llm(
     except Exception as e:
         logger.exception(f"[get_llm] Error initializing LLM for provider='{provider}': {e}")
         raise
-    
 
+
+def get_api_key_fingerprint(api_key: str | None) -> str:
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def get_model_pool_key(provider: str, model_name: str, api_key: str | None = None) -> str:
+    return f"{provider}:{model_name}:{get_api_key_fingerprint(api_key)}"
+
+
+async def aclose_ollama_clients(model: ChatOllama) -> None:
+    """Close the sync and async HTTP clients a ChatOllama instance creates for itself"""
+    try:
+        if model._client is not None:
+            model._client.close()
+        if model._async_client is not None:
+            await model._async_client.close()
+    except Exception as e:
+        logger.debug(f"[aclose_ollama_clients] Could not close clients: {e}")
+
+def close_owned_clients(pool_key: str, pooled: dict) -> None:
+    """
+    Close an evicted model's own HTTP clients after a grace period. Only Ollama models own theirs:
+    OpenAI and Anthropic share lru-cached clients across instances and Google closes its client
+    once the last model using it is collected, so those are left to GC.
+    """
+    model = pooled["model"]
+    if not isinstance(model, ChatOllama):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No loop to wait on; the sync client can go now, the async one is left to GC
+        if model._client is not None:
+            model._client.close()
+        return
+    loop.call_later(MODEL_CLOSE_GRACE_SECONDS, lambda: loop.create_task(aclose_ollama_clients(model)))
+    logger.info(f"[model_pool] Scheduled client close | key={pool_key}")
+
+
+settings = get_settings()
+# Chat model clients and their structured-output wrappers, shared by every entry point.
+# Keys carry a fingerprint of the API key, never the key itself.
+model_pool = ResourceCache(
+    name="model_pool",
+    max_size=settings.model_pool_max_size,
+    idle_ttl=settings.model_pool_idle_ttl,
+    on_evict=close_owned_clients,
+)
+
+def get_pooled_model_entry(provider: str, model_name: str, api_key: str | None = None) -> dict:
+    pool_key = get_model_pool_key(provider, model_name, api_key)
+    pooled = model_pool.get(pool_key)
+    if pooled is None:
+        started_at = time.perf_counter()
+        model = get_llm(provider=provider, model_name=model_name, api_key=api_key)
+        pooled = {"model": model, "structured": {}}
+        model_pool.put(pool_key, pooled, build_time=time.perf_counter() - started_at)
+        logger.info(f"[get_pooled_llm] Pooled new client | {provider}/{model_name}")
+    return pooled
+
+def get_pooled_llm(provider: str, model_name: str, api_key: str | None = None) -> BaseChatModel:
+    """Return a shared chat model client for (provider, model, key), creating it on first use"""
+    return get_pooled_model_entry(provider, model_name, api_key)["model"]
+
+def get_structured_llm(provider: str, model_name: str, schema: type, api_key: str | None = None) -> Runnable:
+    """Shared `with_structured_output(schema)` wrapper over the pooled client"""
+    pooled = get_pooled_model_entry(provider, model_name, api_key)
+    structured = pooled["structured"].get(schema.__name__)
+    if structured is None:
+        structured = pooled["model"].with_structured_output(schema)
+        pooled["structured"][schema.__name__] = structured
+    return structured
+
+def get_streaming_structured_llm(provider: str, model_name: str, schema: type, api_key: str | None = None) -> Runnable:
+    """
+    Tool-calling wrapper whose `astream` yields the schema's arguments as growing partial dicts,
+    for callers that act on fields before the whole object is generated. Validate the last dict.
+    """
+    pooled = get_pooled_model_entry(provider, model_name, api_key)
+    cache_key = f"{schema.__name__}:stream"
+    streaming = pooled["structured"].get(cache_key)
+    if streaming is None:
+        try:
+            bound = pooled["model"].bind_tools([schema], tool_choice=schema.__name__)
+        except (NotImplementedError, TypeError, ValueError):
+            # Providers without forced tool choice still call the only tool they are given
+            bound = pooled["model"].bind_tools([schema])
+        streaming = bound | JsonOutputKeyToolsParser(key_name=schema.__name__, first_tool_only=True)
+        pooled["structured"][cache_key] = streaming
+    return streaming
+
+def evict_pooled_llms(provider: str, model_name: str) -> None:
+    """Drop every pooled client for a provider/model, whatever key it was built with"""
+    prefix = f"{provider}:{model_name}:"
+    for pool_key in model_pool.keys():
+        if pool_key.startswith(prefix):
+            model_pool.pop(pool_key)
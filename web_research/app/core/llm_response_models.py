@@ -34,6 +34,9 @@ class ResearchTool(str, Enum):
     ARXIV = "arxiv"
     #WEBSCRAPER = "webscraper"
 
+# Nodes whose model can be chosen per request with `model_routing`
+ROUTED_NODES = ("planner", "synthesis", "quality")
+
 # Models for Query Planner Node
 class PlannedQuery(BaseModel):
     """A single query with assigned tools"""
@@ -65,6 +68,19 @@ class SearchQueryResult(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
     results: List[SearchResult] = Field(description="List of Search Results")
 
+class SearchResultRef(BaseModel):
+    """Pointer to a SearchQueryResult in the blob store; the graph state carries these instead of the results"""
+    digest: str = Field(description="Content hash of the stored SearchQueryResult")
+    query: str = Field(description="The search query that was executed")
+    tool: ResearchTool = Field(description="The tool that was executed for this query")
+    result_count: int = Field(description="Number of results in the stored blob")
+
+class SkippedSearch(BaseModel):
+    """A planned (query, tool) pair that produced no results"""
+    query: str = Field(description="The search query that was skipped")
+    tool: ResearchTool = Field(description="The tool that was not run or failed")
+    reason: str = Field(description="Why the search was skipped (circuit_open | timeout | queue_timeout | time_budget | error: <message> | unknown_tool)")
+
 class SearchGatherOutput(BaseModel):
     """Output from Search & Gather node"""
     search_results: List[SearchQueryResult] = Field(description="Results for all the executed search queries")
@@ -99,12 +115,23 @@ class SynthesisOutput(BaseModel):
     citations: List[Citations] = Field(description="List of all citations used in the report")
     metadata: SynthesisMetadata = Field(description="Metadata about the report")
 
+class ReportSection(BaseModel):
+    """A markdown section added to an existing report"""
+    heading: str = Field(description="Section heading without the leading #")
+    content: str = Field(description="Markdown body of the section with inline citation markers")
+
+class SynthesisPatch(BaseModel):
+    """Additions to an existing report from new search results (incremental synthesis)"""
+    new_sections: List[ReportSection] = Field(description="New sections covering what the report was missing")
+    new_citations: List[Citations] = Field(description="Citations used by the new sections only, numbered from the given starting id")
+    self_assesment: str = Field(description="Brief self-assessment of how well the updated report covers the query")
+
 # Quality Check Node
 class QualityScores(BaseModel):
-    """Quality assessment scores"""
-    citation_accuracy: float = Field(description="Percentage of citations that were accurate (0-1)", ge=0.0, le=1.0)
-    coverage: float = Field(description="How well the original query is answered (0-1)", ge=0.0, le=1.0)
-    coherence: float = Field(description="Overall quality and coherence of the report", ge=0.0, le=1.0)
+    """Quality assessment scores; None marks a score that was not assessed (local checks only)"""
+    citation_accuracy: Optional[float] = Field(default=None, description="Percentage of citations that were accurate (0-1)", ge=0.0, le=1.0)
+    coverage: Optional[float] = Field(default=None, description="How well the original query is answered (0-1)", ge=0.0, le=1.0)
+    coherence: Optional[float] = Field(default=None, description="Overall quality and coherence of the report", ge=0.0, le=1.0)
 
 class CitationIssue(BaseModel):
     """Issue found with a specific citation"""
@@ -65,10 +65,10 @@ Original Query: {original_query}
 Report to Review:
 {report}
 
-Citations to Verify:
-{citations}
+Citations to Verify (each with the matching excerpt of its source):
+{citation_evidence}
 
-Original Search Results (for verification):
-{search_results}
+Perform a thorough quality check and provide your assessment."""
 
-Perform a thorough quality check and provide your assessment."""
\ No newline at end of file
+# Replaces the citation evidence when every citation passed the local checks
+CITATIONS_VERIFIED_NOTE = """All {count} citations were verified mechanically: their URLs are in the search results, every [n] marker has an entry, and each quote was found in its source text. Do not re-verify them; focus on coverage and coherence."""
\ No newline at end of file
@@ -38,4 +38,43 @@ Original Research Query: {original_query}
 Search Results:
 {search_results}
 
-Generate a comprehensive, well-cited research report following all the guidelines above."""
\ No newline at end of file
+Generate a comprehensive, well-cited research report following all the guidelines above."""
+
+# Appended to SYNTHESIS_PROMPT when the quality checker asked for a revision
+REVISION_SUFFIX = """
+
+## Reviewer Feedback On The Previous Draft
+Address every point below in the new report:
+{revision_instructions}"""
+
+INCREMENTAL_SYNTHESIS_PROMPT = """You are an expert research writer extending an existing, well-cited research report with newly gathered sources. Do NOT rewrite the existing report; only write what it is missing.
+
+## What To Produce
+- New sections that fill the coverage gaps below, using ONLY the new search results
+- Each section has a heading and a markdown body with inline citation markers
+- Citations for the new sections only, numbered consecutively starting at [{next_citation_id}]
+- Do not repeat claims the existing report already makes (see its outline and citations)
+
+## Citation Rules
+- Every factual statement needs a citation
+- Citations must be accurate - only cite what the source actually says
+- Do NOT fabricate or assume information not in the sources
+
+Original Research Query: {original_query}
+
+Coverage Gaps To Fill:
+{coverage_gaps}
+
+Reviewer Guidance:
+{revision_instructions}
+
+Existing Report Outline:
+{outline}
+
+Existing Citations (id: claim):
+{existing_citations}
+
+New Search Results:
+{search_results}
+
+Write the new sections and their citations."""
\ No newline at end of file
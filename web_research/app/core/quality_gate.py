@@ -0,0 +1,98 @@
+import re
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from app.core.llm_response_models import (
+    IssueSeverity, NextSteps, PlannedQuery, QualityAction, QualityCheckOutput, QualityScores, ResearchDepth
+)
+
+# Words a report should reach for its depth before it can count as complete
+MIN_REPORT_WORDS = {
+    ResearchDepth.SHALLOW: 250,
+    ResearchDepth.MODERATE: 600,
+    ResearchDepth.DEEP: 1200,
+}
+# Paragraphs shorter than this are headings, captions or list stubs and need no citation
+MIN_PARAGRAPH_WORDS = 20
+# A planned topic counts as covered when this share of its terms appears in the report
+TOPIC_TERM_SHARE = 0.5
+# Any heuristic below this is a clear failure that needs no model review
+HEURISTIC_FAIL_SCORE = 0.3
+STOPWORDS = {"the", "and", "for", "with", "what", "how", "why", "are", "does", "from", "into", "about", "between", "vs"}
+CITATION_MARKER = re.compile(r"\[\d+\]")
+
+
+class ReportHeuristics(BaseModel):
+    """Deterministic report scores in 0-1, computed before any model sees the report"""
+    citation_density: float = Field(description="Share of substantial paragraphs with at least one citation marker; 1 when there are none")
+    topic_coverage: float = Field(description="Share of planned queries whose terms appear in the report")
+    length_ratio: float = Field(description="Word count relative to the minimum for the depth, capped at 1")
+    uncovered_topics: List[str] = Field(default_factory=list)
+    word_count: int = 0
+
+    @property
+    def clear_fail(self) -> bool:
+        return min(self.citation_density, self.topic_coverage, self.length_ratio) < HEURISTIC_FAIL_SCORE
+
+
+def topic_terms(text: str) -> set:
+    return {term for term in re.findall(r"\w+", text.lower()) if len(term) > 2 and term not in STOPWORDS}
+
+def score_report(report: str, planned_queries: List[PlannedQuery], depth: Optional[ResearchDepth]) -> ReportHeuristics:
+    words = report.split()
+    paragraphs = [p for p in re.split(r"\n\s*\n", report) if len(p.split()) >= MIN_PARAGRAPH_WORDS and not p.lstrip().startswith("#")]
+    cited = [p for p in paragraphs if CITATION_MARKER.search(p)]
+
+    report_terms = topic_terms(report)
+    uncovered = []
+    for planned_query in planned_queries:
+        terms = topic_terms(planned_query.query)
+        if terms and len(terms & report_terms) / len(terms) < TOPIC_TERM_SHARE:
+            uncovered.append(planned_query.query)
+
+    min_words = MIN_REPORT_WORDS.get(depth, MIN_REPORT_WORDS[ResearchDepth.MODERATE])
+    return ReportHeuristics(
+        # Short cited paragraphs or bullet lists leave nothing to measure, which is no reason to fail
+        citation_density=len(cited) / len(paragraphs) if paragraphs else 1.0,
+        topic_coverage=1 - len(uncovered) / len(planned_queries) if planned_queries else 1.0,
+        length_ratio=min(1.0, len(words) / min_words),
+        uncovered_topics=uncovered,
+        word_count=len(words)
+    )
+
+def heuristic_failure(heuristics: ReportHeuristics, previous: Optional[QualityCheckOutput]) -> QualityCheckOutput:
+    """Revision request built from the heuristics alone; citation accuracy and coherence are carried over or left unassessed"""
+    problems = []
+    if heuristics.length_ratio < HEURISTIC_FAIL_SCORE:
+        problems.append(f"The report is far too short ({heuristics.word_count} words); expand each section with cited detail.")
+    if heuristics.citation_density < HEURISTIC_FAIL_SCORE:
+        problems.append("Most paragraphs have no citation marker; cite every factual statement.")
+    if heuristics.topic_coverage < HEURISTIC_FAIL_SCORE:
+        problems.append("Cover the researched topics: " + "; ".join(heuristics.uncovered_topics))
+
+    return QualityCheckOutput(
+        passed=False,
+        scores=QualityScores(
+            citation_accuracy=previous.scores.citation_accuracy if previous else None,
+            coverage=heuristics.topic_coverage,
+            coherence=previous.scores.coherence if previous else None
+        ),
+        citation_issues=[],
+        coverage_gaps=heuristics.uncovered_topics,
+        action=QualityAction.REVISE,
+        next_steps=NextSteps(revision_instructions="\n".join(problems))
+    )
+
+def is_decisive(check: QualityCheckOutput, pass_score: float, fail_score: float) -> bool:
+    """
+    Whether a small model's verdict can stand: a pass with every score at or above `pass_score`
+    and no high-severity issue, or a failure with some score at or below `fail_score`.
+    Anything in between, or a verdict missing a score, is borderline and goes to the main model.
+    """
+    scores = [check.scores.citation_accuracy, check.scores.coverage, check.scores.coherence]
+    if None in scores:
+        return False
+    lowest = min(scores)
+    if check.passed:
+        has_high_issue = any(issue.severity == IssueSeverity.HIGH for issue in check.citation_issues)
+        return check.action == QualityAction.APPROVE and lowest >= pass_score and not has_high_issue
+    return lowest <= fail_score
@@ -1,17 +1,47 @@
 #state_graph.py
-from app.core.llm_response_models import QueryPlanOutput, SearchQueryResult, SynthesisOutput, QualityCheckOutput, ResearchDepth
-from typing import Annotated, TypedDict, Optional, List
+from app.core.llm_response_models import QueryPlanOutput, SearchQueryResult, SearchResultRef, SkippedSearch, SynthesisOutput, QualityCheckOutput, ResearchDepth
+from app.services.cancellation import CancellationToken
+from typing import Annotated, TypedDict, Optional, List, Union
 import operator
 
+SearchResultEntry = Union[SearchResultRef, SearchQueryResult]
+
+def merge_search_refs(existing: Optional[List[SearchResultEntry]], new: Optional[List[SearchResultEntry]]) -> List[SearchResultEntry]:
+    """
+    Reducer for search_results: appends blob references, skipping blobs already referenced.
+    Overlapping sources across blobs are folded when the results are loaded (see `dedupe_search_results`).
+    """
+    merged = list(existing or [])
+    seen = {entry.digest for entry in merged if isinstance(entry, SearchResultRef)}
+    for entry in new or []:
+        if isinstance(entry, SearchResultRef):
+            if entry.digest in seen:
+                continue
+            seen.add(entry.digest)
+        merged.append(entry)
+    return merged
+
 class ResearchState(TypedDict):
     original_query: str
     depth: ResearchDepth
     search_plan: Optional[QueryPlanOutput]
-    search_results: Annotated[List[SearchQueryResult], operator.add] 
+    # References into the search result blob store (app.services.blob_store), not the results themselves
+    search_results: Annotated[List[SearchResultEntry], merge_search_refs]
+    skipped_searches: Annotated[List[SkippedSearch], operator.add]
+    # Keys ("tool:normalized query") of searches already run in this thread
+    executed_searches: Annotated[List[str], operator.add]
     synthesis: Optional[SynthesisOutput]  
+    # Number of loaded (deduplicated) search result groups the current synthesis was written from
+    synthesized_search_count: int
     quality_check: Optional[QualityCheckOutput]  
     action: Optional[str]
     iteration_count: int
     max_iterations: int
     is_complete: bool
-    
\ No newline at end of file
+    
+
+class ResearchContext(TypedDict, total=False):
+    """Per-invocation values passed as `context=`; never checkpointed or traced"""
+    api_key: Optional[str]
+    # Set when the run is registered for cluster-wide cancellation
+    cancellation: CancellationToken
@@ -1,7 +1,15 @@
 import arxiv
+import xml.etree.ElementTree as ET
 from typing import List, Dict, Any
+from app.services.http_client import get_http_client
 from app.utils.logger import logger
 
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+ATOM_NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "arxiv": "http://arxiv.org/schemas/atom",
+}
+
 def arxiv_search(query: str, max_results:int=5) -> List[Dict[str, Any]]:
     """Search using ArXiv API"""
     client = arxiv.Client()
@@ -32,4 +40,54 @@ def arxiv_search(query: str, max_results:int=5) -> List[Dict[str, Any]]:
         return results
     except Exception as e:
         logger.error(f"Error in ArXiv search: {str(e)}")
-        return []
\ No newline at end of file
+        return []
+
+def parse_arxiv_feed(feed: str) -> List[Dict[str, Any]]:
+    """Parse an arXiv Atom feed into the same shape `arxiv_search` returns"""
+    root = ET.fromstring(feed)
+    results = []
+    for entry in root.findall("atom:entry", ATOM_NS):
+        entry_id = entry.findtext("atom:id", default="", namespaces=ATOM_NS)
+        # An errored query comes back as a single entry pointing at the api/errors page
+        if "/api/errors" in entry_id:
+            raise ValueError(entry.findtext("atom:summary", default="arXiv API error", namespaces=ATOM_NS))
+
+        pdf_url = next(
+            (link.get("href") for link in entry.findall("atom:link", ATOM_NS) if link.get("title") == "pdf"),
+            None
+        )
+        primary = entry.find("arxiv:primary_category", ATOM_NS)
+        published = entry.findtext("atom:published", default="", namespaces=ATOM_NS)
+
+        results.append({
+            "title": " ".join(entry.findtext("atom:title", default="", namespaces=ATOM_NS).split()),
+            "url": entry_id,
+            "snippet": entry.findtext("atom:summary", default="", namespaces=ATOM_NS).strip(),
+            "source": "arxiv",
+            "metadata": {
+                "authors": [author.findtext("atom:name", default="", namespaces=ATOM_NS) for author in entry.findall("atom:author", ATOM_NS)],
+                "published": published[:10],
+                "categories": [category.get("term") for category in entry.findall("atom:category", ATOM_NS)],
+                "primary_category": primary.get("term") if primary is not None else "",
+                "pdf_url": pdf_url
+            }
+        })
+    return results
+
+async def async_arxiv_search(query: str, max_results:int=5) -> List[Dict[str, Any]]:
+    """Search the arXiv Atom API over the shared async HTTP client"""
+    try:
+        client = get_http_client()
+        response = await client.get(ARXIV_API_URL, params={
+            "search_query": query,
+            "start": 0,
+            "max_results": max_results,
+            "sortBy": "relevance",
+            "sortOrder": "descending",
+        })
+        response.raise_for_status()
+        return parse_arxiv_feed(response.text)
+    except Exception as e:
+        # Raised rather than swallowed so the tool scheduler can count the failure
+        logger.error(f"Error in ArXiv search: {str(e)}")
+        raise
@@ -0,0 +1,30 @@
+import asyncio
+import inspect
+from typing import Any, Callable, Dict
+from app.core.llm_response_models import ResearchTool
+from app.core.tools.arxiv_search import async_arxiv_search
+from app.core.tools.wikipedia_search import async_wikipedia_search
+from app.core.tools.tavily_search import async_tavily_search_tool
+
+# Tools may be plain functions or coroutine functions with the signature
+# (query: str, max_results: int). Blocking tools are run on the default executor.
+TOOL_FUNCTIONS: Dict[ResearchTool, Callable[..., Any]] = {
+    ResearchTool.TAVILY: async_tavily_search_tool,
+    ResearchTool.WIKIPEDIA: async_wikipedia_search,
+    ResearchTool.ARXIV: async_arxiv_search,
+}
+
+def register_tool(tool_name: ResearchTool, tool_fn: Callable[..., Any]) -> None:
+    TOOL_FUNCTIONS[tool_name] = tool_fn
+
+def is_async_tool(tool_name: ResearchTool) -> bool:
+    return inspect.iscoroutinefunction(TOOL_FUNCTIONS[tool_name])
+
+async def invoke_tool(tool_name: ResearchTool, query: str, max_results: int) -> Any:
+    """Run a registered tool, awaiting async tools directly and offloading sync ones to a thread"""
+    tool_fn = TOOL_FUNCTIONS[tool_name]
+    if inspect.iscoroutinefunction(tool_fn):
+        return await tool_fn(query, max_results)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, tool_fn, query, max_results)
@@ -0,0 +1,288 @@
+import asyncio
+import math
+import time
+import weakref
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Any, Dict, Optional
+from app.core.llm_response_models import ResearchTool
+from app.core.tools.registry import invoke_tool
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+# concurrency: in-flight calls per tool in this process
+# rate/burst: token bucket refill rate (calls per second) and bucket size
+# failure_threshold/reset_timeout: consecutive failures that open the circuit
+#   and seconds before a single probe call is let through again
+# timeout: deadline in seconds for one call, including any hedged duplicate, counted from the
+#   moment the call holds its slots and rate token
+# queue_timeout: seconds a call may wait for its slots and token before it is skipped
+# idempotent: safe to send a duplicate (hedged) request when the first is slow
+TOOL_LIMITS = {
+    ResearchTool.TAVILY: {"concurrency": 8, "rate": 5.0, "burst": 10, "failure_threshold": 5, "reset_timeout": 30.0, "timeout": 15.0, "queue_timeout": 15.0, "idempotent": True},
+    ResearchTool.WIKIPEDIA: {"concurrency": 4, "rate": 3.0, "burst": 6, "failure_threshold": 5, "reset_timeout": 30.0, "timeout": 10.0, "queue_timeout": 15.0, "idempotent": True},
+    ResearchTool.ARXIV: {"concurrency": 2, "rate": 0.5, "burst": 2, "failure_threshold": 3, "reset_timeout": 60.0, "timeout": 20.0, "queue_timeout": 30.0, "idempotent": True},
+}
+DEFAULT_TOOL_LIMITS = {"concurrency": 4, "rate": 2.0, "burst": 4, "failure_threshold": 5, "reset_timeout": 30.0, "timeout": 15.0, "queue_timeout": 15.0, "idempotent": False}
+
+# Hedging only kicks in once enough latencies are recorded for a meaningful p95
+LATENCY_WINDOW = 200
+MIN_HEDGE_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a tool whose circuit breaker is open"""
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a tool call misses its deadline"""
+
+
+class ToolQueueTimeoutError(Exception):
+    """Raised when a call waits too long for a slot or rate token; the tool itself was never called"""
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one tool"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        # The lock makes waiters take tokens in arrival order
+        async with self.lock:
+            self.refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= 1
+
+    def available(self) -> bool:
+        """A token can be taken right now without waiting"""
+        self.refill()
+        return not self.lock.locked() and self.tokens >= 1
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Returns True when this failure opened the circuit"""
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state != self.OPEN and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def release_probe(self):
+        """A probe that was cancelled proves nothing either way"""
+        self.probe_in_flight = False
+
+
+class ToolScheduler:
+    """
+    Wraps `invoke_tool` with a process-wide concurrency cap shared by every research thread,
+    plus a semaphore, token bucket, circuit breaker and deadline per tool.
+    Idempotent tools get a hedged duplicate request when the first one is slower than their p95.
+    """
+
+    def __init__(self, global_concurrency: int):
+        self.global_semaphore = asyncio.Semaphore(global_concurrency)
+        self.semaphores: Dict[ResearchTool, asyncio.Semaphore] = {}
+        self.buckets: Dict[ResearchTool, TokenBucket] = {}
+        self.breakers: Dict[ResearchTool, CircuitBreaker] = {}
+        self.in_flight: Dict[ResearchTool, int] = {}
+        self.latencies: Dict[ResearchTool, LatencyTracker] = {}
+        self.hedges: Dict[ResearchTool, int] = {}
+        self.limits: Dict[ResearchTool, dict] = {}
+
+        for tool_name in ResearchTool:
+            limits = TOOL_LIMITS.get(tool_name, DEFAULT_TOOL_LIMITS)
+            self.limits[tool_name] = limits
+            self.latencies[tool_name] = LatencyTracker()
+            self.hedges[tool_name] = 0
+            self.semaphores[tool_name] = asyncio.Semaphore(limits["concurrency"])
+            self.buckets[tool_name] = TokenBucket(limits["rate"], limits["burst"])
+            self.breakers[tool_name] = CircuitBreaker(limits["failure_threshold"], limits["reset_timeout"])
+            self.in_flight[tool_name] = 0
+
+    async def run(self, tool_name: ResearchTool, query: str, max_results: int) -> Any:
+        # Fail fast instead of queueing behind the limits for a tool that is known to be down
+        if self.breakers[tool_name].is_open():
+            raise CircuitOpenError(f"Circuit open for tool {tool_name.value}")
+        return await self.run_hedged(tool_name, query, max_results)
+
+    def has_capacity(self, tool_name: ResearchTool) -> bool:
+        """A call could start right now without queueing for a slot or token"""
+        return not self.global_semaphore.locked() and not self.semaphores[tool_name].locked() and self.buckets[tool_name].available()
+
+    async def run_hedged(self, tool_name: ResearchTool, query: str, max_results: int) -> Any:
+        timeout = self.limits[tool_name]["timeout"]
+        hedge_after = None
+        if self.limits[tool_name]["idempotent"]:
+            hedge_after = self.latencies[tool_name].percentile(HEDGE_PERCENTILE)
+        if hedge_after is None or hedge_after >= timeout:
+            return await self.attempt(tool_name, query, max_results, timeout)
+
+        # The hedge timer starts when the primary call does, not while it queues
+        primary_started = asyncio.Event()
+        attempts = [asyncio.create_task(self.attempt(tool_name, query, max_results, timeout, primary_started))]
+        started = asyncio.create_task(primary_started.wait())
+        try:
+            await asyncio.wait([attempts[0], started], return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+            if not done:
+                # A duplicate would only queue behind the primary or take another call's slot
+                if self.has_capacity(tool_name):
+                    logger.info(f"[ToolScheduler] Hedging | tool={tool_name.value} | after={hedge_after:.2f}s | query={query!r}")
+                    self.hedges[tool_name] += 1
+                    # Share the primary's deadline, which started hedge_after seconds ago
+                    attempts.append(asyncio.create_task(self.attempt(tool_name, query, max_results, timeout - hedge_after)))
+                else:
+                    logger.debug(f"[ToolScheduler] Not hedging, tool saturated | tool={tool_name.value} | query={query!r}")
+
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        return task.result()
+            # Every attempt failed; surface the first error
+            return attempts[0].result()
+        finally:
+            for task in [started, *attempts]:
+                task.cancel()
+            await asyncio.gather(started, *attempts, return_exceptions=True)
+
+    async def attempt(
+        self,
+        tool_name: ResearchTool,
+        query: str,
+        max_results: int,
+        timeout: float,
+        started: Optional[asyncio.Event] = None
+    ) -> Any:
+        breaker = self.breakers[tool_name]
+        queue_timeout = self.limits[tool_name]["queue_timeout"]
+        async with AsyncExitStack() as slots:
+            try:
+                # Per-tool limits first: a call queued behind a throttled tool must not hold
+                # one of the global slots other tools need
+                async with asyncio.timeout(queue_timeout):
+                    await slots.enter_async_context(self.semaphores[tool_name])
+                    await self.buckets[tool_name].acquire()
+                    await slots.enter_async_context(self.global_semaphore)
+            except TimeoutError:
+                # Local congestion says nothing about the tool's health, so the breaker is left alone
+                raise ToolQueueTimeoutError(f"Tool {tool_name.value} stayed saturated for {queue_timeout}s")
+
+            # Re-check: the circuit may have opened while this call was queued
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for tool {tool_name.value}")
+            if started is not None:
+                started.set()
+            try:
+                async with asyncio.timeout(timeout):
+                    return await self.call(tool_name, breaker, query, max_results)
+            except TimeoutError:
+                # The call was cancelled by the timeout, so count the miss here
+                if breaker.record_failure():
+                    logger.warning(f"[ToolScheduler] Circuit opened | tool={tool_name.value} | failures={breaker.failures}")
+                raise ToolTimeoutError(f"Tool {tool_name.value} exceeded its {self.limits[tool_name]['timeout']}s deadline")
+
+    async def call(self, tool_name: ResearchTool, breaker: CircuitBreaker, query: str, max_results: int) -> Any:
+        self.in_flight[tool_name] += 1
+        started_at = time.monotonic()
+        try:
+            result = await invoke_tool(tool_name, query, max_results)
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception:
+            if breaker.record_failure():
+                logger.warning(f"[ToolScheduler] Circuit opened | tool={tool_name.value} | failures={breaker.failures}")
+            raise
+        finally:
+            self.in_flight[tool_name] -= 1
+
+        self.latencies[tool_name].record(time.monotonic() - started_at)
+        breaker.record_success()
+        return result
+
+    def stats(self) -> dict:
+        return {
+            tool_name.value: {
+                "circuit": self.breakers[tool_name].state,
+                "consecutive_failures": self.breakers[tool_name].failures,
+                "in_flight": self.in_flight[tool_name],
+                "p95_latency": self.latencies[tool_name].percentile(HEDGE_PERCENTILE),
+                "hedged_requests": self.hedges[tool_name],
+            }
+            for tool_name in ResearchTool
+        }
+
+
+# One scheduler per event loop, since its semaphores and locks only work on the loop that uses them;
+# in the API and worker that is a single process-wide scheduler
+tool_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ToolScheduler]" = weakref.WeakKeyDictionary()
+
+def get_tool_scheduler() -> ToolScheduler:
+    loop = asyncio.get_running_loop()
+    scheduler = tool_schedulers.get(loop)
+    if scheduler is None:
+        scheduler = tool_schedulers[loop] = ToolScheduler(get_settings().tool_global_concurrency)
+    return scheduler
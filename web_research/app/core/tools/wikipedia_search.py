@@ -1,18 +1,133 @@
+import threading
 import wikipedia
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from app.services.http_client import get_http_client
+from app.utils.config import get_settings
 from app.utils.logger import logger
 
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+SUMMARY_SENTENCES = 5
+MAX_CATEGORIES = 5
+
+# Page metadata keyed by revision id. A revision is immutable, so entries never go stale;
+# an edited page simply gets a new revision id and misses.
+page_cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+page_cache_lock = threading.Lock()
+
+def get_cached_page(revision_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    if revision_id is None:
+        return None
+    with page_cache_lock:
+        page = page_cache.get(revision_id)
+        if page is not None:
+            page_cache.move_to_end(revision_id)
+        return page
+
+def cache_page(revision_id: Optional[int], page: Dict[str, Any]) -> None:
+    max_size = get_settings().wikipedia_page_cache_size
+    if revision_id is None or max_size <= 0:
+        return
+    with page_cache_lock:
+        page_cache[revision_id] = page
+        page_cache.move_to_end(revision_id)
+        while len(page_cache) > max_size:
+            page_cache.popitem(last=False)
+
+def search_params(query: str, max_results: int, with_content: bool) -> Dict[str, Any]:
+    """
+    generator=search returns the hits as pages, so their info (url, pageid, lastrevid, length)
+    comes back in the same response. With `with_content` the extracts and categories are included too.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrlimit": max_results,
+        "prop": "info",
+        "inprop": "url",
+    }
+    if with_content:
+        params.update(content_params())
+        params["prop"] = "info|extracts|categories"
+    return params
+
+def content_params() -> Dict[str, Any]:
+    return {
+        "prop": "extracts|categories",
+        "exintro": 1,
+        "explaintext": 1,
+        "exsentences": SUMMARY_SENTENCES,
+        "exlimit": "max",
+        "cllimit": "max",
+        "clshow": "!hidden",
+    }
+
+def batch_params(titles: List[str]) -> Dict[str, Any]:
+    """Extracts and categories for several titles in one multi-title query"""
+    return {
+        "action": "query",
+        "format": "json",
+        "formatversion": 2,
+        "titles": "|".join(titles),
+        **content_params(),
+    }
+
+def query_pages(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    pages = data.get("query", {}).get("pages", [])
+    pages = [page for page in pages if not page.get("missing")]
+    return sorted(pages, key=lambda page: page.get("index", 0))
+
+def to_result(page: Dict[str, Any], content: Dict[str, Any]) -> Dict[str, Any]:
+    categories = [c["title"].removeprefix("Category:") for c in content.get("categories", [])]
+    return {
+        "title": page["title"],
+        "url": page.get("fullurl", ""),
+        "snippet": content.get("extract", ""),
+        "source": "wikipedia",
+        "metadata": {
+            "pageid": str(page.get("pageid", "")),
+            "revision_id": page.get("lastrevid"),
+            "categories": categories[:MAX_CATEGORIES],
+            # Size of the wikitext from page info; avoids downloading the article body
+            "content_length": page.get("length", 0)
+        }
+    }
+
+def uncached_titles(pages: List[Dict[str, Any]]) -> List[str]:
+    return [page["title"] for page in pages if get_cached_page(page.get("lastrevid")) is None]
+
+def merge_pages(pages: List[Dict[str, Any]], fetched: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Combine search hits with cached or freshly fetched content, keeping search rank order"""
+    content_by_title = {page["title"]: page for page in fetched}
+    results = []
+    for page in pages:
+        revision_id = page.get("lastrevid")
+        cached = get_cached_page(revision_id)
+        if cached is not None:
+            results.append(cached)
+            continue
+        if page["title"] not in content_by_title:
+            logger.error(f"Error fetching Wikipedia page {page['title']}: missing from batch response")
+            continue
+        result = to_result(page, content_by_title[page["title"]])
+        cache_page(revision_id, result)
+        results.append(result)
+    return results
+
 def wikipedia_search(query: str, max_results:int=5) -> List[Dict[str, Any]]:
     """Search using Wikipedia API"""
     try:
         search_results = wikipedia.search(query, results=max_results)
-        
+
         results = []
         for page_title in search_results:
             try:
                 page = wikipedia.page(page_title, auto_suggest=False)
-                summary = wikipedia.summary(page_title, sentences=5, auto_suggest=False)
-                
+                summary = wikipedia.summary(page_title, sentences=SUMMARY_SENTENCES, auto_suggest=False)
+
                 results.append({
                     "title": page.title,
                     "url": page.url,
@@ -21,15 +136,37 @@ def wikipedia_search(query: str, max_results:int=5) -> List[Dict[str, Any]]:
                     "metadata": {
                         "pageid": page.pageid,
                         "revision_id": page.revision_id,
-                        "categories": page.categories[:5],
+                        "categories": page.categories[:MAX_CATEGORIES],
                         "content_length": len(page.content)
                     }
                 })
             except Exception as e:
                 logger.error(f"Error fetching Wikipedia page {page_title}: {str(e)}")
                 continue
-        
+
         return results
     except Exception as e:
         logger.error(f"Error in Wikipedia search: {str(e)}")
-        return []
\ No newline at end of file
+        return []
+
+async def async_wikipedia_request(params: Dict[str, Any]) -> Dict[str, Any]:
+    client = get_http_client()
+    response = await client.get(WIKIPEDIA_API_URL, params=params)
+    response.raise_for_status()
+    return response.json()
+
+async def async_wikipedia_search(query: str, max_results:int=5) -> List[Dict[str, Any]]:
+    """Batched Wikipedia search over the shared async HTTP client"""
+    try:
+        if get_settings().wikipedia_page_cache_size <= 0:
+            pages = query_pages(await async_wikipedia_request(search_params(query, max_results, with_content=True)))
+            return [to_result(page, page) for page in pages]
+
+        pages = query_pages(await async_wikipedia_request(search_params(query, max_results, with_content=False)))
+        titles = uncached_titles(pages)
+        fetched = query_pages(await async_wikipedia_request(batch_params(titles))) if titles else []
+        return merge_pages(pages, fetched)
+    except Exception as e:
+        # Raised rather than swallowed so the tool scheduler can count the failure
+        logger.error(f"Error in Wikipedia search: {str(e)}")
+        raise
@@ -1,5 +1,26 @@
-from app.core.llm_response_models import ResearchTool, SourceType, SearchQueryResult
-from typing import Any, List
+from app.core.llm_response_models import ResearchTool, SourceType, SearchQueryResult, SearchResult
+from app.utils.config import get_settings
+from typing import Any, List, Optional, Tuple
+import re
+
+# Rough context window (tokens) by model name prefix; the longest matching prefix wins
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-5": 400_000,
+    "o3": 200_000,
+    "o4": 200_000,
+    "claude": 200_000,
+    "gemini": 1_000_000,
+}
+DEFAULT_CONTEXT_WINDOW = 32_000
+# Share of the window the search results may take; the rest is prompt and report
+CONTEXT_RESULTS_SHARE = 0.5
+# A snippet is never cut below this many tokens; below it the result is dropped instead
+MIN_SNIPPET_TOKENS = 40
+# Header lines (id, title, url, date, score, metadata) per result
+RESULT_OVERHEAD_TOKENS = 40
+QUERY_HEADER_TOKENS = 60
 
 def get_source_type(tool_name: ResearchTool) -> SourceType:
     """Map tool to source type"""
@@ -43,18 +64,90 @@ def parse_tool_results(raw_results: Any, tool_name: ResearchTool):
     
     return []
 
-def format_search_results(search_results: List[SearchQueryResult]):
-    """Format search results in a compact format for the LLM prompt"""
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; close enough for budgeting without loading a tokenizer"""
+    return len(text) // 4 + 1
+
+def get_context_token_budget(model_name: Optional[str]) -> int:
+    """Tokens available to search results in the synthesis prompt for this model"""
+    name = (model_name or "").lower()
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    window = MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+    return min(get_settings().synthesis_context_tokens, int(window * CONTEXT_RESULTS_SHARE))
+
+def query_terms(text: str) -> set:
+    return {term for term in re.findall(r"\w+", text.lower()) if len(term) > 2}
+
+def rank_result(result: SearchResult, terms: set) -> float:
+    """Tool score (neutral when missing) blended with the share of query terms the result mentions"""
+    score = result.score if result.score is not None else 0.5
+    if not terms:
+        return score
+    overlap = len(terms & query_terms(f"{result.title} {result.content}")) / len(terms)
+    return 0.5 * score + 0.5 * overlap
+
+def pack_search_results(
+    search_results: List[SearchQueryResult],
+    token_budget: int,
+    query: str = "",
+    first_id: int = 1
+) -> Tuple[dict, int]:
+    """
+    Choose which results fit the budget and how many content characters each keeps.
+    Every result gets an equal allowance; the highest ranked are admitted first and
+    the lowest ranked are dropped once the budget is spent.
+    Returns {citation_id: max_chars} and the number of dropped results.
+    """
+    flattened = [result for search_result in search_results for result in search_result.results]
+    if not flattened:
+        return {}, 0
+
+    available = token_budget - QUERY_HEADER_TOKENS * len(search_results)
+    allowance = max(MIN_SNIPPET_TOKENS, available // len(flattened) - RESULT_OVERHEAD_TOKENS)
+
+    terms = query_terms(query)
+    # Citation ids are positions in the flattened list, so they stay the same across iterations
+    ranked = sorted(enumerate(flattened, start=first_id), key=lambda item: rank_result(item[1], terms), reverse=True)
+
+    kept = {}
+    for citation_id, result in ranked:
+        cost = RESULT_OVERHEAD_TOKENS + min(estimate_tokens(result.content), allowance)
+        if cost > available:
+            continue
+        kept[citation_id] = allowance * 4
+        available -= cost
+    return kept, len(flattened) - len(kept)
+
+def format_search_results(
+    search_results: List[SearchQueryResult],
+    token_budget: Optional[int] = None,
+    query: str = "",
+    first_id: int = 1
+):
+    """
+    Format search results in a compact format for the LLM prompt.
+    With a `token_budget`, results are packed to fit it (see `pack_search_results`);
+    a result keeps its citation id whether or not others around it were dropped.
+    `first_id` numbers a tail of the results as it would be numbered in the full list.
+    """
     formatted = []
-    citation_id = 1
+    citation_id = first_id
+    kept, dropped = pack_search_results(search_results, token_budget, query, first_id) if token_budget else (None, 0)
     
     for search_result in search_results:
+        first_id = citation_id
+        citation_id += len(search_result.results)
+        if kept is not None and not any(first_id + i in kept for i in range(len(search_result.results))):
+            continue
+
         formatted.append(f"\n{'='*80}")
         formatted.append(f"Query: '{search_result.query}' | Tool: {search_result.tool.value} | Source: {search_result.source_type.value}")
         formatted.append(f"{'='*80}\n")
         
-        for result in search_result.results:
-            formatted.append(f"[{citation_id}] {result.title}")
+        for result_id, result in enumerate(search_result.results, start=first_id):
+            if kept is not None and result_id not in kept:
+                continue
+            formatted.append(f"[{result_id}] {result.title}")
             formatted.append(f"    URL: {result.url}")
             
             if result.date:
@@ -63,6 +156,8 @@ def format_search_results(search_results: List[SearchQueryResult]):
                 formatted.append(f"    Score: {result.score:.2f}")
             
             content_preview = result.content.replace('\n', ' ')
+            if kept is not None:
+                content_preview = content_preview[:kept[result_id]]
             formatted.append(f"    Content: {content_preview}...")
             
             if result.metadata:
@@ -77,6 +172,8 @@ def format_search_results(search_results: List[SearchQueryResult]):
                     formatted.append(f"    Metadata: {' | '.join(meta_str)}")
             
             formatted.append("")
-            citation_id += 1
+
+    if dropped:
+        formatted.append(f"({dropped} lower-ranked results omitted to fit the context budget)")
     
     return "\n".join(formatted)
\ No newline at end of file
@@ -6,14 +6,28 @@ from app.api import routes
 from app.utils.config import get_settings, Settings
 from app.utils.logger import logger
 from app.services.redis_client import get_redis_client, init_redis, close_redis
+from app.services.http_client import init_http_client, close_http_client
+from app.services.task_events import task_event_hub
 from app.services.checkpointer import close_redis_checkpointer, get_redis_checkpointer
+from app.services.checkpoint_retention import checkpoint_compactor
+from app.services.cancellation import cancellation_registry
+from app.core.agent import set_app_loop
+import asyncio
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_redis()
+    init_http_client()
     await get_redis_checkpointer() 
+    # Sync run_agent calls from worker threads run on this loop, next to the shared caches
+    set_app_loop(asyncio.get_running_loop())
     yield
+    set_app_loop(None)
+    await task_event_hub.stop()
+    await checkpoint_compactor.stop()
+    await cancellation_registry.stop()
+    await close_http_client()
     await close_redis()
 
 app = FastAPI(lifespan=lifespan)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
+from app.core.llm_response_models import ROUTED_NODES
 
 class ResearchDepth(str, Enum):
     SHALLOW = "shallow"
@@ -14,6 +15,20 @@ class SearchRequest(BaseModel):
     model_provider: Optional[str] = Field(default="openai")
     model_name: Optional[str] = Field(default="gpt-4o-mini")
     api_key: Optional[str] = None
+    # Per-node model override: {"planner": "ollama/qwen2.5", "synthesis": "openai/gpt-4o", "quality": "gpt-4o-mini"}
+    model_routing: Optional[Dict[str, str]] = Field(default=None)
+
+    @field_validator("model_routing")
+    @classmethod
+    def check_routed_nodes(cls, model_routing):
+        unknown = set(model_routing or {}) - set(ROUTED_NODES)
+        if unknown:
+            raise ValueError(f"Unknown nodes in model_routing: {', '.join(sorted(unknown))}")
+        return model_routing
+
+class ResumeRequest(BaseModel):
+    # The API key is never stored with the thread, so it is passed again
+    api_key: Optional[str] = None
 
 class TaskStatusResponse(BaseModel):
     task_id: str
@@ -21,4 +36,6 @@ class TaskStatusResponse(BaseModel):
     created_at: str
     completed_at: Optional[str] = None
     result: Optional[dict] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    # current_node, iteration, search_results_count, updated_at and node_seconds while running
+    progress: Optional[dict] = None
\ No newline at end of file
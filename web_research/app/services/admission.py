@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import time
+from typing import List, Optional, Tuple
+from uuid import uuid4
+from redis.exceptions import WatchError
+from app.models.models import ResearchDepth
+from app.services.redis_client import get_redis_client, is_redis_initialized
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+# Relative cost of one iteration per depth; a run costs weight x max_iteration
+DEPTH_WEIGHT = {
+    ResearchDepth.SHALLOW: 1,
+    ResearchDepth.MODERATE: 2,
+    ResearchDepth.DEEP: 4,
+}
+GLOBAL_LEASES_KEY = "admission:leases:global"
+# Queued runs as `{arrival}|{id}|{tenant}|{cost}` tickets scored by expiry; the fixed-width
+# arrival timestamp makes member order the queue order
+WAITING_KEY = "admission:waiting"
+# Seconds between admission attempts while queued
+POLL_INTERVAL = 0.5
+
+admission_stats = {"admitted": 0, "queued": 0, "rejected": 0}
+
+
+class AdmissionRejected(Exception):
+    """Capacity stayed exhausted for the whole queueing window"""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def get_tenant_leases_key(tenant: str) -> str:
+    return f"admission:leases:tenant:{tenant}"
+
+def get_tenant(api_key: Optional[str]) -> str:
+    """Quota bucket for an API key; the key itself is never written to Redis"""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def estimate_cost(depth: Optional[str], max_iteration: Optional[int]) -> int:
+    try:
+        weight = DEPTH_WEIGHT[ResearchDepth((depth or "moderate").lower())]
+    except ValueError:
+        weight = DEPTH_WEIGHT[ResearchDepth.MODERATE]
+    return weight * max(1, max_iteration or 1)
+
+def live_cost(members: List[Tuple[bytes, float]], now: float) -> int:
+    """Sum of the costs encoded in unexpired `{id}|...|{cost}` members"""
+    return sum(int(member.rsplit(b"|", 1)[1]) for member, expires_at in members if expires_at > now)
+
+def make_ticket(tenant: str, cost: int) -> str:
+    return f"{time.time():017.6f}|{uuid4().hex}|{tenant}|{cost}"
+
+def get_queue_ahead(waiting: List[Tuple[bytes, float]], ticket: Optional[str], now: float) -> List[Tuple[str, int]]:
+    """(tenant, cost) of the live tickets queued before `ticket`; every live ticket for a run not queued yet"""
+    ahead = []
+    for member, expires_at in waiting:
+        member = member.decode("utf-8")
+        if expires_at <= now or (ticket is not None and member >= ticket):
+            continue
+        _, _, tenant, cost = member.split("|")
+        ahead.append((tenant, int(cost)))
+    return ahead
+
+
+class Lease:
+    """
+    Capacity held by one run. Renewed in the background until released, so a crashed process's
+    leases expire; a lease whose renewal never starts expires after admission_lease_ttl.
+    """
+
+    def __init__(self, lease_id: str, tenant: str, cost: int):
+        self.member = f"{lease_id}|{cost}"
+        self.tenant = tenant
+        self.cost = cost
+        self.renewer: Optional[asyncio.Task] = None
+        self.released = False
+
+    def start_renewing(self):
+        if self.renewer is None and not self.released:
+            self.renewer = asyncio.create_task(self.renew_loop())
+
+    async def renew_loop(self):
+        ttl = get_settings().admission_lease_ttl
+        while True:
+            await asyncio.sleep(max(1, ttl // 3))
+            try:
+                expires_at = time.time() + ttl
+                pipe = get_redis_client().pipeline(transaction=False)
+                pipe.zadd(GLOBAL_LEASES_KEY, {self.member: expires_at}, xx=True, ch=True)
+                pipe.zadd(get_tenant_leases_key(self.tenant), {self.member: expires_at}, xx=True, ch=True)
+                if all(await pipe.execute()):
+                    continue
+                # The lease expired (e.g. the process stalled past its TTL) or Redis lost it, but the
+                # run still uses the capacity, so put it back rather than let others oversubscribe
+                logger.warning(f"[Lease] Lease was missing on renewal, re-adding | tenant={self.tenant} | cost={self.cost}")
+                pipe = get_redis_client().pipeline(transaction=False)
+                pipe.zadd(GLOBAL_LEASES_KEY, {self.member: expires_at})
+                pipe.zadd(get_tenant_leases_key(self.tenant), {self.member: expires_at})
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"[Lease] Renewal failed | tenant={self.tenant} | {e}")
+
+    async def release(self):
+        """Safe to call more than once"""
+        if self.released:
+            return
+        self.released = True
+        if self.renewer is not None:
+            self.renewer.cancel()
+            await asyncio.gather(self.renewer, return_exceptions=True)
+            self.renewer = None
+        try:
+            pipe = get_redis_client().pipeline(transaction=False)
+            pipe.zrem(GLOBAL_LEASES_KEY, self.member)
+            pipe.zrem(get_tenant_leases_key(self.tenant), self.member)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"[Lease] Release failed, lease will expire | tenant={self.tenant} | {e}")
+
+
+async def try_acquire(tenant: str, cost: int, ticket: Optional[str] = None) -> Optional[Lease]:
+    """
+    Take `cost` units of global and tenant capacity in one optimistic transaction;
+    None when either cap would be exceeded. Capacity is reserved for the tickets queued ahead of
+    `ticket` (all queued tickets when None), so runs are admitted in arrival order and a large
+    run cannot be starved by smaller ones; a later run only gets in if everything ahead still fits.
+    Expired leases and tickets are dropped on the way.
+    """
+    settings = get_settings()
+    tenant_key = get_tenant_leases_key(tenant)
+    lease = Lease(uuid4().hex, tenant, cost)
+
+    async with get_redis_client().pipeline(transaction=True) as pipe:
+        while True:
+            try:
+                await pipe.watch(GLOBAL_LEASES_KEY, tenant_key)
+                now = time.time()
+                global_used = live_cost(await pipe.zrange(GLOBAL_LEASES_KEY, 0, -1, withscores=True), now)
+                tenant_used = live_cost(await pipe.zrange(tenant_key, 0, -1, withscores=True), now)
+                # Not watched: tickets joining later queue behind this one, and one leaving only frees capacity
+                ahead = get_queue_ahead(await pipe.zrange(WAITING_KEY, 0, -1, withscores=True), ticket, now)
+                global_used += sum(ahead_cost for _, ahead_cost in ahead)
+                tenant_used += sum(ahead_cost for ahead_tenant, ahead_cost in ahead if ahead_tenant == tenant)
+                if global_used + cost > settings.admission_global_capacity or tenant_used + cost > settings.admission_tenant_capacity:
+                    await pipe.unwatch()
+                    return None
+
+                expires_at = now + settings.admission_lease_ttl
+                pipe.multi()
+                pipe.zremrangebyscore(GLOBAL_LEASES_KEY, "-inf", now)
+                pipe.zremrangebyscore(tenant_key, "-inf", now)
+                pipe.zremrangebyscore(WAITING_KEY, "-inf", now)
+                pipe.zadd(GLOBAL_LEASES_KEY, {lease.member: expires_at})
+                pipe.zadd(tenant_key, {lease.member: expires_at})
+                await pipe.execute()
+                return lease
+            except WatchError:
+                continue
+
+async def acquire(
+    api_key: Optional[str],
+    depth: Optional[str],
+    max_iteration: Optional[int],
+    wait: Optional[float],
+    renew: bool = True
+) -> Optional[Lease]:
+    """
+    Admit a run, queueing for up to `wait` seconds (None waits until admitted) when capacity is
+    exhausted, then raise AdmissionRejected. Returns None when admission control is off.
+    A run costing more than a cap is clamped to it, so it can still run alone.
+    With `renew=False` the caller starts the renewal once the run actually begins.
+    """
+    settings = get_settings()
+    if not settings.admission_control or not is_redis_initialized():
+        return None
+
+    tenant = get_tenant(api_key)
+    cost = min(estimate_cost(depth, max_iteration), settings.admission_global_capacity, settings.admission_tenant_capacity)
+    lease = await try_acquire(tenant, cost)
+    if lease is None:
+        admission_stats["queued"] += 1
+        ticket = make_ticket(tenant, cost)
+        deadline = None if wait is None else time.monotonic() + wait
+        logger.info(f"[admission] Queued | tenant={tenant} | cost={cost}")
+        try:
+            while lease is None:
+                if deadline is not None and time.monotonic() >= deadline:
+                    admission_stats["rejected"] += 1
+                    logger.warning(f"[admission] Rejected after queueing | tenant={tenant} | cost={cost}")
+                    raise AdmissionRejected(settings.admission_retry_after, "Research capacity exhausted, retry later")
+                # Waiting entries expire like leases, so a crashed waiter drops out of the counters
+                await get_redis_client().zadd(WAITING_KEY, {ticket: time.time() + POLL_INTERVAL * 4})
+                await asyncio.sleep(POLL_INTERVAL)
+                lease = await try_acquire(tenant, cost, ticket)
+        finally:
+            await get_redis_client().zrem(WAITING_KEY, ticket)
+
+    admission_stats["admitted"] += 1
+    if renew:
+        lease.start_renewing()
+    return lease
+
+async def release(lease: Optional[Lease]):
+    if lease is not None:
+        await lease.release()
+
+async def get_admission_stats() -> dict:
+    """Running and queued work across all processes, plus this process's admission counters"""
+    settings = get_settings()
+    now = time.time()
+    pipe = get_redis_client().pipeline(transaction=False)
+    pipe.zrange(GLOBAL_LEASES_KEY, 0, -1, withscores=True)
+    pipe.zrange(WAITING_KEY, 0, -1, withscores=True)
+    leases, waiting = await pipe.execute()
+    leases = [(member, expires_at) for member, expires_at in leases if expires_at > now]
+    waiting = [(member, expires_at) for member, expires_at in waiting if expires_at > now]
+    return {
+        "enabled": settings.admission_control,
+        "running": len(leases),
+        "running_cost": live_cost(leases, now),
+        "queued": len(waiting),
+        "queued_cost": live_cost(waiting, now),
+        "global_capacity": settings.admission_global_capacity,
+        "tenant_capacity": settings.admission_tenant_capacity,
+        "local": dict(admission_stats),
+    }
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Union
+from app.core.llm_response_models import SearchQueryResult, SearchResultRef
+from app.services.redis_client import get_redis_client, is_redis_initialized
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+# Decoded results by digest. Blobs are immutable, so entries never go stale.
+blob_cache: "OrderedDict[str, SearchQueryResult]" = OrderedDict()
+blob_cache_lock = threading.Lock()
+
+# File blobs expire by mtime like Redis blobs do by TTL; writes and loads refresh the mtime and
+# the store sweeps the directory at most this often (seconds)
+FILE_SWEEP_INTERVAL = 3600
+last_file_sweep = 0.0
+file_sweep_task: Optional[asyncio.Task] = None
+
+
+def get_blob_key(digest: str) -> str:
+    return f"blob:search:{digest}"
+
+def get_blob_path(digest: str) -> Path:
+    return Path(get_settings().search_blob_dir) / digest[:2] / f"{digest}.json"
+
+def use_redis() -> bool:
+    return get_settings().search_blob_store == "redis" and is_redis_initialized()
+
+def serialize_result(result: SearchQueryResult) -> bytes:
+    return result.model_dump_json().encode("utf-8")
+
+def get_digest(result: SearchQueryResult) -> str:
+    """Hash of the content without the fetch timestamp, so identical responses share one blob"""
+    return hashlib.sha256(result.model_dump_json(exclude={"timestamp"}).encode("utf-8")).hexdigest()
+
+def cache_blob(digest: str, result: SearchQueryResult) -> None:
+    max_size = get_settings().search_blob_cache_size
+    if max_size <= 0:
+        return
+    with blob_cache_lock:
+        blob_cache[digest] = result
+        blob_cache.move_to_end(digest)
+        while len(blob_cache) > max_size:
+            blob_cache.popitem(last=False)
+
+def get_cached_blob(digest: str) -> Optional[SearchQueryResult]:
+    with blob_cache_lock:
+        result = blob_cache.get(digest)
+        if result is not None:
+            blob_cache.move_to_end(digest)
+        return result
+
+def write_file(digest: str, payload: bytes) -> None:
+    path = get_blob_path(digest)
+    if path.exists():
+        os.utime(path)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(payload)
+    tmp_path.replace(path)
+
+def read_file(digest: str) -> Optional[bytes]:
+    path = get_blob_path(digest)
+    return path.read_bytes() if path.exists() else None
+
+def touch_files(digests: List[str]) -> None:
+    for digest in digests:
+        try:
+            os.utime(get_blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+def sweep_files(max_age: int) -> int:
+    """Delete file blobs not written or loaded for `max_age` seconds; returns how many were removed"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in Path(get_settings().search_blob_dir).glob("*/*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+async def run_file_sweep(max_age: int) -> None:
+    try:
+        removed = await asyncio.to_thread(sweep_files, max_age)
+        if removed:
+            logger.info(f"[blob_store] Removed expired file blobs | count={removed}")
+    except Exception as e:
+        logger.warning(f"[blob_store] File blob sweep failed | {e}")
+
+def schedule_file_sweep() -> None:
+    global last_file_sweep, file_sweep_task
+    now = time.monotonic()
+    if now - last_file_sweep < FILE_SWEEP_INTERVAL or (file_sweep_task is not None and not file_sweep_task.done()):
+        return
+    last_file_sweep = now
+    file_sweep_task = asyncio.create_task(run_file_sweep(get_settings().search_blob_ttl))
+
+async def refresh_blobs(digests: List[str]) -> None:
+    """Restart the expiry of blobs a checkpoint still references, so they outlive the thread's use of them"""
+    if not digests:
+        return
+    if use_redis():
+        pipe = get_redis_client().pipeline(transaction=False)
+        for digest in digests:
+            pipe.expire(get_blob_key(digest), get_settings().search_blob_ttl)
+        await pipe.execute()
+    else:
+        await asyncio.to_thread(touch_files, digests)
+
+async def store_search_results(results: List[SearchQueryResult]) -> List[SearchResultRef]:
+    """
+    Write search results to the blob store and return the compact references the graph state keeps.
+    Redis blobs get search_blob_ttl (refreshed on every write and load); without Redis they go to
+    local files, removed once they have not been written or loaded for as long.
+    """
+    if not results:
+        return []
+
+    settings = get_settings()
+    refs, payloads = [], {}
+    for result in results:
+        digest = get_digest(result)
+        refs.append(SearchResultRef(digest=digest, query=result.query, tool=result.tool, result_count=len(result.results)))
+        payloads[digest] = serialize_result(result)
+        cache_blob(digest, result)
+
+    if use_redis():
+        pipe = get_redis_client().pipeline(transaction=False)
+        for digest, payload in payloads.items():
+            pipe.set(get_blob_key(digest), payload, ex=settings.search_blob_ttl)
+        await pipe.execute()
+    else:
+        for digest, payload in payloads.items():
+            await asyncio.to_thread(write_file, digest, payload)
+        schedule_file_sweep()
+    return refs
+
+async def load_search_results(
+    entries: List[Union[SearchResultRef, SearchQueryResult]],
+    missing: Optional[List[str]] = None
+) -> List[SearchQueryResult]:
+    """
+    Resolve references from the state into results, in state order. Results already inline
+    (checkpoints written before the blob store) pass through. Missing blobs (e.g. evicted by
+    Redis) are skipped with a warning and their digests appended to `missing` when given, so
+    callers that index into the list can tell it is shorter than the state.
+    Every referenced blob's expiry is restarted, so results of a resumed or long-running thread
+    do not expire under its checkpoints.
+    """
+    loaded = {}
+    unloaded = []
+    referenced = list(dict.fromkeys(entry.digest for entry in entries if isinstance(entry, SearchResultRef)))
+    for entry in entries:
+        if isinstance(entry, SearchResultRef):
+            cached = get_cached_blob(entry.digest)
+            if cached is not None:
+                loaded[entry.digest] = cached
+            elif entry.digest not in unloaded:
+                unloaded.append(entry.digest)
+
+    if unloaded:
+        if use_redis():
+            payloads = await get_redis_client().mget([get_blob_key(digest) for digest in unloaded])
+        else:
+            payloads = [await asyncio.to_thread(read_file, digest) for digest in unloaded]
+        for digest, payload in zip(unloaded, payloads):
+            if payload is None:
+                logger.warning(f"[blob_store] Missing search result blob | digest={digest}")
+                if missing is not None:
+                    missing.append(digest)
+                continue
+            result = SearchQueryResult.model_validate_json(payload)
+            cache_blob(digest, result)
+            loaded[digest] = result
+
+    try:
+        await refresh_blobs(referenced)
+    except Exception as e:
+        logger.warning(f"[blob_store] Could not refresh blob expiry | {e}")
+
+    results = []
+    for entry in entries:
+        if isinstance(entry, SearchQueryResult):
+            results.append(entry)
+        elif entry.digest in loaded:
+            results.append(loaded[entry.digest])
+    return results
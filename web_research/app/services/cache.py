@@ -1,9 +1,24 @@
+from app.models.models import TaskStatusResponse
 from app.services.redis_client import get_redis_client
+from app.utils.config import get_settings
 from datetime import datetime, timezone
 from typing import Optional
 import json
 import hashlib
 
+TASK_TTL = 3600
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+TASK_CHANNEL_PATTERN = "task:*:events"
+NODE_SECONDS_PREFIX = "node_seconds:"
+
+def get_task_channel(task_id: str) -> str:
+    return f"task:{task_id}:events"
+
+def get_task_progress_key(task_id: str) -> str:
+    return f"task:{task_id}:progress"
+
+def get_thread_meta_key(thread_id: str) -> str:
+    return f"thread:{thread_id}:meta"
 
 async def store_task_status(task_id:str, status:str, data:Optional[dict] = None):
     task_data = {
@@ -15,16 +30,72 @@ async def store_task_status(task_id:str, status:str, data:Optional[dict] = None)
         task_data.update(data)
 
     redis_client = get_redis_client()
-    await redis_client.set(
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(
         f"task:{task_id}",
         json.dumps(task_data).encode("utf-8"),
-        ex=3600
+        ex=TASK_TTL
     )
+    pipe.hgetall(get_task_progress_key(task_id))
+    _, progress = await pipe.execute()
+    # Long-poll and SSE status clients are woken by this instead of polling GET, and get the same record GET returns
+    record = TaskStatusResponse(**task_data, progress=decode_progress(progress))
+    await redis_client.publish(get_task_channel(task_id), record.model_dump_json().encode("utf-8"))
+
+async def update_task_progress(task_id: str, fields: dict, node_seconds: Optional[tuple] = None):
+    """
+    Partial progress update: only the given hash fields are written, the task record is untouched.
+    `node_seconds` is a (node, seconds) pair added to that node's running total.
+    """
+    key = get_task_progress_key(task_id)
+    mapping = {name: str(value) for name, value in fields.items()}
+    mapping["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+    pipe = get_redis_client().pipeline(transaction=False)
+    pipe.hset(key, mapping=mapping)
+    if node_seconds:
+        node, seconds = node_seconds
+        pipe.hincrbyfloat(key, f"{NODE_SECONDS_PREFIX}{node}", round(seconds, 3))
+    pipe.expire(key, TASK_TTL)
+    await pipe.execute()
+
+def decode_progress(raw: dict) -> Optional[dict]:
+    if not raw:
+        return None
+    progress = {"node_seconds": {}}
+    for name, value in raw.items():
+        name, value = name.decode("utf-8"), value.decode("utf-8")
+        if name.startswith(NODE_SECONDS_PREFIX):
+            progress["node_seconds"][name.removeprefix(NODE_SECONDS_PREFIX)] = float(value)
+        elif name in ("iteration", "search_results_count"):
+            progress[name] = int(value)
+        else:
+            progress[name] = value
+    return progress
 
 async def get_task_status(task_id:str):
-    redis_client = get_redis_client()
-    data = await redis_client.get(f"task:{task_id}")
+    pipe = get_redis_client().pipeline(transaction=False)
+    pipe.get(f"task:{task_id}")
+    pipe.hgetall(get_task_progress_key(task_id))
+    data, progress = await pipe.execute()
     if data:
-        return json.loads(data.decode('utf-8'))
+        task_data = json.loads(data.decode('utf-8'))
+        task_data["progress"] = decode_progress(progress)
+        return task_data
     
     return None
+
+async def store_thread_meta(thread_id: str, meta: dict):
+    """
+    Run parameters of a thread (query, depth, models; never the API key), kept as long as
+    its checkpoints so an interrupted run can be resumed with the same graph.
+    """
+    await get_redis_client().set(
+        get_thread_meta_key(thread_id),
+        json.dumps(meta).encode("utf-8"),
+        ex=get_settings().checkpoint_ttl or None
+    )
+
+async def get_thread_meta(thread_id: str) -> Optional[dict]:
+    data = await get_redis_client().get(get_thread_meta_key(thread_id))
+    return json.loads(data.decode("utf-8")) if data else None
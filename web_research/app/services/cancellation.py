@@ -0,0 +1,154 @@
+import asyncio
+import os
+import socket
+from typing import Dict, Optional, Tuple
+from app.services.redis_client import get_redis_client
+from app.utils.logger import logger
+
+CANCEL_CHANNEL = "research:cancel"
+# The running marker is refreshed at every cancellation check, so it outlives any active run
+RUNNING_TTL = 600
+CANCEL_TTL = 3600
+
+
+def get_running_key(thread_id: str) -> str:
+    return f"thread:{thread_id}:running"
+
+def get_cancel_key(thread_id: str) -> str:
+    return f"thread:{thread_id}:cancel"
+
+
+class ThreadBusyError(Exception):
+    """Another run already holds the thread"""
+
+
+class CancellationToken:
+    """
+    Handed to the graph nodes through the run context. Set locally by the registry's
+    subscription; `check` also reads the Redis flag, so a missed pub/sub message still stops
+    the run at its next search or LLM call.
+    """
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.event = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    async def check(self):
+        if not self.event.is_set():
+            try:
+                pipe = get_redis_client().pipeline(transaction=False)
+                pipe.exists(get_cancel_key(self.thread_id))
+                pipe.expire(get_running_key(self.thread_id), RUNNING_TTL)
+                flagged, _ = await pipe.execute()
+            except Exception as e:
+                logger.warning(f"[CancellationToken] Check failed | thread_id={self.thread_id} | {e}")
+                return
+            if flagged:
+                self.event.set()
+        if self.event.is_set():
+            raise asyncio.CancelledError(f"Research cancelled | thread_id={self.thread_id}")
+
+
+class CancellationRegistry:
+    """
+    Cluster-wide cancellation. Each process tracks its own running research tasks and
+    subscribes to one Redis channel; a cancel request published from any process cancels
+    the task wherever it runs.
+    """
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}-{os.getpid()}"
+        self.running: Dict[str, Tuple[asyncio.Task, CancellationToken]] = {}
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        async with self.lock:
+            if self.reader is not None and not self.reader.done():
+                return
+            self.pubsub = get_redis_client().pubsub()
+            await self.pubsub.subscribe(CANCEL_CHANNEL)
+            self.reader = asyncio.create_task(self.read_loop())
+            logger.info("[CancellationRegistry] Subscribed to cancel requests")
+
+    async def stop(self):
+        if self.reader is not None:
+            self.reader.cancel()
+            await asyncio.gather(self.reader, return_exceptions=True)
+            self.reader = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+    async def read_loop(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[CancellationRegistry] Read failed, resubscribing | {e}")
+                await asyncio.sleep(1)
+                await self.pubsub.subscribe(CANCEL_CHANNEL)
+                continue
+
+            if message and message.get("type") == "message":
+                self.cancel_local(message["data"].decode("utf-8"))
+
+    def cancel_local(self, thread_id: str) -> bool:
+        entry = self.running.get(thread_id)
+        if entry is None:
+            return False
+        task, token = entry
+        token.event.set()
+        if not task.done():
+            task.cancel()
+            logger.info(f"[CancellationRegistry] Cancelled | thread_id={thread_id} | owner={self.owner}")
+        return True
+
+    async def claim(self, thread_id: str) -> bool:
+        """
+        Mark an existing thread as running unless a run already holds it anywhere in the cluster.
+        Taken before a resume touches the thread's checkpoints; `unregister` releases it.
+        """
+        if thread_id in self.running:
+            return False
+        return bool(await get_redis_client().set(get_running_key(thread_id), self.owner.encode("utf-8"), nx=True, ex=RUNNING_TTL))
+
+    async def register(self, thread_id: str, task: asyncio.Task) -> CancellationToken:
+        await self.start()
+        token = CancellationToken(thread_id)
+        self.running[thread_id] = (task, token)
+        await get_redis_client().set(get_running_key(thread_id), self.owner.encode("utf-8"), ex=RUNNING_TTL)
+        return token
+
+    async def unregister(self, thread_id: str):
+        self.running.pop(thread_id, None)
+        try:
+            await get_redis_client().delete(get_running_key(thread_id), get_cancel_key(thread_id))
+        except Exception as e:
+            logger.warning(f"[CancellationRegistry] Unregister failed | thread_id={thread_id} | {e}")
+
+    async def is_running(self, thread_id: str) -> bool:
+        return thread_id in self.running or bool(await get_redis_client().exists(get_running_key(thread_id)))
+
+    async def request_cancel(self, thread_id: str) -> bool:
+        """Cancel the run wherever it executes; False when no process is running the thread"""
+        if self.cancel_local(thread_id):
+            return True
+        if not await get_redis_client().exists(get_running_key(thread_id)):
+            return False
+
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.set(get_cancel_key(thread_id), b"1", ex=CANCEL_TTL)
+        pipe.publish(CANCEL_CHANNEL, thread_id.encode("utf-8"))
+        await pipe.execute()
+        return True
+
+
+cancellation_registry = CancellationRegistry()
@@ -0,0 +1,184 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from langgraph.checkpoint.redis.base import BaseRedisSaver
+from langgraph.checkpoint.redis.util import to_storage_safe_id, to_storage_safe_str
+from redisvl.query import FilterQuery
+from redisvl.query.filter import Tag
+from app.services.checkpointer import get_redis_checkpointer
+from app.services.redis_client import get_redis_client
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+# Upper bound on index rows read per thread; a research run writes a few dozen checkpoints
+MAX_THREAD_ROWS = 10000
+
+compaction_stats = {"threads": 0, "deleted_keys": 0, "bytes_freed": 0, "errors": 0}
+
+
+async def search_thread(index, thread_id: str, fields: List[str]) -> list:
+    query = FilterQuery(
+        filter_expression=Tag("thread_id") == to_storage_safe_id(thread_id),
+        return_fields=fields,
+        num_results=MAX_THREAD_ROWS,
+    )
+    return (await index.search(query)).docs
+
+async def get_thread_keys(saver, thread_id: str) -> Dict[str, list]:
+    """
+    Every Redis key of a thread, grouped as (namespace, checkpoint_id, key) for checkpoints and
+    their write registries, (checkpoint_id, key) for pending writes, plus the latest pointers.
+    """
+    safe_thread_id = to_storage_safe_id(thread_id)
+    checkpoints, registries, latest = [], [], set()
+    for doc in await search_thread(saver.checkpoints_index, thread_id, ["checkpoint_ns", "checkpoint_id"]):
+        checkpoint_ns = getattr(doc, "checkpoint_ns", "")
+        checkpoint_id = getattr(doc, "checkpoint_id", "")
+        checkpoints.append((checkpoint_ns, checkpoint_id, BaseRedisSaver._make_redis_checkpoint_key(safe_thread_id, checkpoint_ns, checkpoint_id)))
+        if saver._key_registry:
+            registries.append((checkpoint_ns, checkpoint_id, saver._key_registry.make_write_keys_zset_key(thread_id, checkpoint_ns, checkpoint_id)))
+        latest.add(f"checkpoint_latest:{safe_thread_id}:{to_storage_safe_str(checkpoint_ns)}")
+
+    writes = []
+    for doc in await search_thread(saver.checkpoint_writes_index, thread_id, ["checkpoint_ns", "checkpoint_id", "task_id", "idx"]):
+        checkpoint_id = getattr(doc, "checkpoint_id", "")
+        key = BaseRedisSaver._make_redis_checkpoint_writes_key(
+            safe_thread_id, getattr(doc, "checkpoint_ns", ""), checkpoint_id, getattr(doc, "task_id", ""), getattr(doc, "idx", 0)
+        )
+        writes.append((checkpoint_id, key))
+
+    return {"checkpoints": checkpoints, "registries": registries, "writes": writes, "latest": sorted(latest)}
+
+async def get_key_sizes(redis_client, keys: List[str]) -> Dict[str, int]:
+    """MEMORY USAGE per key; 0 for keys that are gone or when the server does not support it"""
+    if not keys:
+        return {}
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key)
+    try:
+        sizes = await pipe.execute(raise_on_error=False)
+    except Exception as e:
+        logger.warning(f"[checkpoint_retention] MEMORY USAGE failed | {e}")
+        return {key: 0 for key in keys}
+    return {key: size if isinstance(size, int) else 0 for key, size in zip(keys, sizes)}
+
+async def get_thread_checkpoint_stats(thread_id: str) -> dict:
+    """Checkpoint bytes per thread: key counts, total MEMORY USAGE and the remaining TTL"""
+    saver = await get_redis_checkpointer()
+    thread_keys = await get_thread_keys(saver, thread_id)
+    keys = [key for *_, key in thread_keys["checkpoints"] + thread_keys["registries"] + thread_keys["writes"]]
+    sizes = await get_key_sizes(get_redis_client(), keys + thread_keys["latest"])
+    ttl = await get_redis_client().ttl(thread_keys["checkpoints"][0][2]) if thread_keys["checkpoints"] else None
+    return {
+        "thread_id": thread_id,
+        "checkpoints": len(thread_keys["checkpoints"]),
+        "writes": len(thread_keys["writes"]),
+        "bytes": sum(sizes.values()),
+        "ttl": ttl if ttl is None or ttl >= 0 else None
+    }
+
+async def compact_thread(thread_id: str, keep_last: int, ttl: Optional[int] = None) -> dict:
+    """
+    Drop all but the newest `keep_last` checkpoints per namespace of a finished thread, with
+    their pending writes and write registries, and give the surviving keys `ttl` seconds.
+    Checkpoint ids are ULIDs, so their order is the order of the super-steps.
+    """
+    saver = await get_redis_checkpointer()
+    redis_client = get_redis_client()
+    thread_keys = await get_thread_keys(saver, thread_id)
+
+    by_namespace = defaultdict(list)
+    for checkpoint_ns, checkpoint_id, _ in thread_keys["checkpoints"]:
+        by_namespace[checkpoint_ns].append(checkpoint_id)
+    kept: Set[tuple] = set()
+    for checkpoint_ns, checkpoint_ids in by_namespace.items():
+        kept.update((checkpoint_ns, checkpoint_id) for checkpoint_id in sorted(checkpoint_ids, reverse=True)[:max(keep_last, 1)])
+    kept_ids = {checkpoint_id for _, checkpoint_id in kept}
+
+    keep_keys, drop_keys = list(thread_keys["latest"]), []
+    for checkpoint_ns, checkpoint_id, key in thread_keys["checkpoints"] + thread_keys["registries"]:
+        (keep_keys if (checkpoint_ns, checkpoint_id) in kept else drop_keys).append(key)
+    for checkpoint_id, key in thread_keys["writes"]:
+        (keep_keys if checkpoint_id in kept_ids else drop_keys).append(key)
+
+    sizes = await get_key_sizes(redis_client, drop_keys)
+    pipe = redis_client.pipeline(transaction=False)
+    for key in drop_keys:
+        pipe.delete(key)
+    if ttl:
+        for key in keep_keys:
+            pipe.expire(key, ttl)
+    await pipe.execute()
+
+    freed = sum(sizes.values())
+    compaction_stats["threads"] += 1
+    compaction_stats["deleted_keys"] += len(drop_keys)
+    compaction_stats["bytes_freed"] += freed
+    logger.info(
+        f"[compact_thread] Compacted | thread_id={thread_id} | kept={len(kept)} | "
+        f"deleted_keys={len(drop_keys)} | bytes_freed={freed}"
+    )
+    return {"thread_id": thread_id, "kept_checkpoints": len(kept), "deleted_keys": len(drop_keys), "bytes_freed": freed}
+
+async def compact_for_resume(thread_id: str):
+    """
+    Drop the superseded checkpoints of an interrupted thread before it resumes; the surviving keys
+    keep their TTL. Awaited before the run continues, so it cannot race the run's own writes.
+    """
+    settings = get_settings()
+    if not settings.checkpoint_compaction:
+        return
+    try:
+        await compact_thread(thread_id, settings.checkpoint_keep_last)
+    except Exception as e:
+        compaction_stats["errors"] += 1
+        logger.warning(f"[compact_for_resume] Compaction failed, resuming anyway | thread_id={thread_id} | {e}")
+
+
+class CheckpointCompactor:
+    """
+    Background queue of finished threads. Compaction runs off the request path, one thread at a
+    time, and a thread scheduled twice before it is processed is compacted once.
+    """
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.pending: Set[str] = set()
+        self.worker: Optional[asyncio.Task] = None
+
+    def schedule(self, thread_id: str):
+        settings = get_settings()
+        if not settings.checkpoint_compaction or thread_id in self.pending:
+            return
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue()
+            self.pending.clear()
+            self.worker = asyncio.create_task(self.run())
+        self.pending.add(thread_id)
+        self.queue.put_nowait(thread_id)
+
+    async def run(self):
+        settings = get_settings()
+        while True:
+            thread_id = await self.queue.get()
+            self.pending.discard(thread_id)
+            try:
+                await compact_thread(thread_id, settings.checkpoint_keep_last, settings.checkpoint_completed_ttl)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                compaction_stats["errors"] += 1
+                logger.warning(f"[CheckpointCompactor] Compaction failed | thread_id={thread_id} | {e}")
+
+    async def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            await asyncio.gather(self.worker, return_exceptions=True)
+            self.worker = None
+
+
+checkpoint_compactor = CheckpointCompactor()
+
+def get_compaction_stats() -> dict:
+    return {**compaction_stats, "queued": len(checkpoint_compactor.pending)}
@@ -1,15 +1,46 @@
 import asyncio
+import time
 from app.utils.logger import logger
-from typing import Optional
+from app.utils.config import get_settings
+from app.utils.resource_cache import ResourceCache
 from langgraph.checkpoint.redis.aio import AsyncRedisSaver
 from app.services.redis_client import get_redis_client
-from app.core.graph import create_graph
+from app.core.graph import create_graph, resolve_model_routing
+from typing import Dict, Optional
+from app.core.llm import evict_pooled_llms, model_pool
 
-graph_cache = {}
+def graph_models(entry: dict) -> set:
+    """Every (provider, model) a cached graph's nodes call"""
+    return set(resolve_model_routing(entry["model_provider"], entry["model_name"], entry.get("model_routing")).values())
+
+def release_graph(cache_key: str, entry: dict):
+    """Drop the lock and the pooled model clients that no other cached graph still uses"""
+    graph_locks.pop(cache_key, None)
+    still_used = set()
+    for other_key, other in graph_cache.items():
+        if other_key != cache_key:
+            still_used |= graph_models(other)
+    for model_provider, model_name in graph_models(entry) - still_used:
+        evict_pooled_llms(model_provider, model_name)
+
+settings = get_settings()
+graph_cache = ResourceCache(
+    name="graph_cache",
+    max_size=settings.graph_cache_max_size,
+    idle_ttl=settings.graph_cache_idle_ttl,
+    on_evict=release_graph,
+)
 graph_locks = {}
 redis_checkpointer = None
 checkpointer_lock = asyncio.Lock()
 
+def get_checkpoint_ttl_config() -> Optional[dict]:
+    """AsyncRedisSaver TTL config (it counts in minutes); None keeps checkpoints until compacted"""
+    ttl = settings.checkpoint_ttl
+    if ttl <= 0:
+        return None
+    return {"default_ttl": ttl / 60, "refresh_on_read": True}
+
 async def get_redis_checkpointer():
     global redis_checkpointer
 
@@ -24,20 +55,42 @@ async def get_redis_checkpointer():
 
         redis_client = get_redis_client()
 
-        redis_checkpointer = AsyncRedisSaver(redis_client=redis_client)
+        redis_checkpointer = AsyncRedisSaver(redis_client=redis_client, ttl=get_checkpoint_ttl_config())
+        await redis_checkpointer.asetup()
 
         logger.info("Redis checkpointer initialized")
         return redis_checkpointer
     
-def get_graph_cache_key(model_provider: str, model_name:str) -> str:
-    return f"graph:{model_provider}:{model_name}"
+def get_routing_key(model_routing: Optional[Dict[str, str]] = None) -> str:
+    """Order-independent form of a node -> model map, for cache keys"""
+    return ",".join(f"{node}={target}" for node, target in sorted((model_routing or {}).items()))
+
+def get_graph_cache_key(
+    model_provider: str,
+    model_name:str,
+    persistent: bool = True,
+    model_routing: Optional[Dict[str, str]] = None
+) -> str:
+    key = f"graph:{model_provider}:{model_name}"
+    routing_key = get_routing_key(model_routing)
+    if routing_key:
+        key = f"{key}:route[{routing_key}]"
+    return key if persistent else f"{key}:ephemeral"
 
 async def get_or_create_graph(
     model_provider:str,
     model_name:str,
-    api_key: Optional[str] = None,
+    persistent: bool = True,
+    model_routing: Optional[Dict[str, str]] = None,
 ):
-    cache_key = get_graph_cache_key(model_provider, model_name)
+    """
+    Shared compiled graph for (provider, model, routing), used by every entry point.
+    The graph holds no API key; callers bind it per run with `context={"api_key": ...}`.
+    `persistent=False` compiles without a checkpointer, for callers that have no Redis
+    and only need the final state (e.g. `run_agent`).
+    `model_routing` picks a different model per node (see `create_graph`) and is part of the cache key.
+    """
+    cache_key = get_graph_cache_key(model_provider, model_name, persistent, model_routing)
 
     if cache_key not in graph_locks:
         graph_locks[cache_key] = asyncio.Lock()
@@ -50,34 +103,45 @@ async def get_or_create_graph(
     # if not found:
     # A -> accquires lock -> checks again -> creats graph -> stores in cache -> returns graph -> releases lock
     # B -> accquires lock -> checks again -> return graph from cache -> releases lock
-    if cache_key in graph_cache:
+    entry = graph_cache.get(cache_key)
+    if entry is not None:
         logger.info(f"Using cached graph for {cache_key}")
-        return graph_cache[cache_key]
+        return entry["graph"]
     
     async with lock:
-        if cache_key in graph_cache:
+        entry = graph_cache.get(cache_key)
+        if entry is not None:
             logger.info(f"Using cached graph for {cache_key} (after lock)")
-            return graph_cache[cache_key]
+            return entry["graph"]
         
-        checkpointer = await get_redis_checkpointer()
+        started_at = time.perf_counter()
+        checkpointer = await get_redis_checkpointer() if persistent else None
 
         logger.info(f"Creating and caching new graph for {cache_key}")
         graph = create_graph(
             checkpointer=checkpointer,
             model_provider=model_provider,
             model_name=model_name,
-            api_key=api_key
+            model_routing=model_routing
         )
 
-        graph_cache[cache_key] = graph
+        graph_cache.put(
+            cache_key,
+            {"graph": graph, "model_provider": model_provider, "model_name": model_name, "model_routing": model_routing},
+            build_time=time.perf_counter() - started_at
+        )
         logger.info(f"Graph cached successfully for {cache_key}")
 
         return graph
     
 def get_cached_stats():
+    """Graph and model client cache contents with per-key hits, build times and last-used timestamps"""
+    graph_stats = graph_cache.stats()
     return {
-        "cached_graphs": list(graph_cache.keys()),
-        "cache_size": len(graph_cache),
+        "cached_graphs": list(graph_stats["entries"].keys()),
+        "cache_size": graph_stats["size"],
+        "graph_cache": graph_stats,
+        "model_pool": model_pool.stats(),
         "redis_checkpointer_active": redis_checkpointer is not None
     }
 
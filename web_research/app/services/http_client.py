@@ -0,0 +1,31 @@
+import httpx
+
+# Wikimedia rejects requests without a descriptive User-Agent
+USER_AGENT = "WebResearcher/0.1 (https://github.com/Sagnnik/agent_orchestration)"
+HTTP_TIMEOUT = httpx.Timeout(20.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=50)
+
+http_client = None
+
+def init_http_client() -> None:
+    global http_client
+    if http_client is not None:
+        return
+    http_client = httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        timeout=HTTP_TIMEOUT,
+        limits=HTTP_LIMITS,
+        follow_redirects=True,
+    )
+
+async def close_http_client() -> None:
+    global http_client
+    if http_client:
+        await http_client.aclose()
+        http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared connection pool for the async search tools; created lazily outside the API process"""
+    if http_client is None:
+        init_http_client()
+    return http_client
@@ -0,0 +1,126 @@
+import json
+from typing import List, Optional, Tuple
+from redis.exceptions import ResponseError
+from app.services.redis_client import get_redis_client
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+# Approximate cap on stream length; acknowledged entries past it are trimmed by XADD
+STREAM_MAX_LEN = 10_000
+
+
+def get_job_secret_key(task_id: str) -> str:
+    return f"job:{task_id}:api_key"
+
+async def ensure_consumer_group() -> None:
+    settings = get_settings()
+    try:
+        await get_redis_client().xgroup_create(
+            settings.job_queue_stream, settings.job_queue_group, id="0", mkstream=True
+        )
+        logger.info(f"[job_queue] Created consumer group {settings.job_queue_group} on {settings.job_queue_stream}")
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+async def enqueue_research_job(job: dict, api_key: Optional[str] = None) -> str:
+    """
+    Add a research job to the stream. The API key is kept out of the stream entry (which lives
+    until trimmed) in a separate key that expires and is deleted once the job finishes.
+    """
+    settings = get_settings()
+    redis_client = get_redis_client()
+    await ensure_consumer_group()
+
+    if api_key:
+        secret_ttl = settings.job_visibility_timeout * (settings.job_max_deliveries + 1) + 3600
+        await redis_client.set(get_job_secret_key(job["task_id"]), api_key.encode("utf-8"), ex=secret_ttl)
+
+    message_id = await redis_client.xadd(
+        settings.job_queue_stream,
+        {"payload": json.dumps(job).encode("utf-8")},
+        maxlen=STREAM_MAX_LEN,
+        approximate=True
+    )
+    return message_id.decode("utf-8")
+
+async def get_job_api_key(task_id: str) -> Optional[str]:
+    redis_client = get_redis_client()
+    api_key = await redis_client.get(get_job_secret_key(task_id))
+    return api_key.decode("utf-8") if api_key else None
+
+async def delete_job_api_key(task_id: str) -> None:
+    await get_redis_client().delete(get_job_secret_key(task_id))
+
+def decode_messages(messages) -> List[Tuple[str, dict]]:
+    decoded = []
+    for message_id, fields in messages or []:
+        payload = fields.get(b"payload")
+        decoded.append((message_id.decode("utf-8"), json.loads(payload.decode("utf-8")) if payload else {}))
+    return decoded
+
+async def read_new_jobs(consumer: str, count: int, block_ms: int) -> List[Tuple[str, dict]]:
+    settings = get_settings()
+    response = await get_redis_client().xreadgroup(
+        settings.job_queue_group,
+        consumer,
+        streams={settings.job_queue_stream: ">"},
+        count=count,
+        block=block_ms
+    )
+    if not response:
+        return []
+    _, messages = response[0]
+    return decode_messages(messages)
+
+async def claim_stale_jobs(consumer: str, count: int) -> List[Tuple[str, dict]]:
+    """Take over jobs whose consumer has not heartbeated within the visibility timeout"""
+    settings = get_settings()
+    response = await get_redis_client().xautoclaim(
+        settings.job_queue_stream,
+        settings.job_queue_group,
+        consumer,
+        min_idle_time=settings.job_visibility_timeout * 1000,
+        start_id="0-0",
+        count=count
+    )
+    return decode_messages(response[1])
+
+async def extend_visibility(consumer: str, message_id: str) -> None:
+    """Reset the idle time of a job this consumer is still working on"""
+    settings = get_settings()
+    await get_redis_client().xclaim(
+        settings.job_queue_stream,
+        settings.job_queue_group,
+        consumer,
+        min_idle_time=0,
+        message_ids=[message_id],
+        justid=True
+    )
+
+async def get_delivery_count(message_id: str) -> int:
+    settings = get_settings()
+    pending = await get_redis_client().xpending_range(
+        settings.job_queue_stream,
+        settings.job_queue_group,
+        min=message_id,
+        max=message_id,
+        count=1
+    )
+    return pending[0]["times_delivered"] if pending else 1
+
+async def ack_job(message_id: str) -> None:
+    settings = get_settings()
+    await get_redis_client().xack(settings.job_queue_stream, settings.job_queue_group, message_id)
+
+async def get_queue_stats() -> dict:
+    settings = get_settings()
+    redis_client = get_redis_client()
+    try:
+        summary = await redis_client.xpending(settings.job_queue_stream, settings.job_queue_group)
+        groups = await redis_client.xinfo_groups(settings.job_queue_stream)
+    except ResponseError:
+        return {"pending": 0, "lag": 0}
+
+    group = next((g for g in groups if g.get("name") in (settings.job_queue_group, settings.job_queue_group.encode())), {})
+    return {"pending": summary.get("pending", 0), "lag": group.get("lag")}
@@ -0,0 +1,155 @@
+import hashlib
+import math
+import re
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from pydantic import BaseModel
+from app.services.redis_client import get_redis_client, is_redis_initialized
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+T = TypeVar("T", bound=BaseModel)
+
+# Settings flag that enables the exact-match cache for each graph node
+NODE_CACHE_FLAGS = {
+    "planner": "llm_cache_planner",
+    "synthesis": "llm_cache_synthesis",
+    "quality": "llm_cache_quality",
+}
+
+# Local similarity index: hashed character trigram vectors, newest entries kept
+TRIGRAM_DIMENSIONS = 512
+SIMILARITY_INDEX_SIZE = 2000
+
+STATS_KEY = "llm_cache:stats"
+llm_cache_stats = {"hits": 0, "similar_hits": 0, "misses": 0, "errors": 0}
+
+
+def get_llm_cache_key(node: str, provider: str, model_name: str, schema: type, prompt: str) -> str:
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"llm_cache:{node}:{provider}:{model_name}:{schema.__name__}:{digest}"
+
+def trigram_vector(text: str) -> List[float]:
+    """
+    Hashed character trigram counts, L2-normalized. Not a semantic embedding: it measures
+    surface overlap only, so near-identical queries (case, punctuation, word order, a changed
+    word) score close to 1, while paraphrases and synonyms score low, and a short query that
+    differs in one key word (e.g. a negation or a year) can still clear a high threshold.
+    """
+    text = re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", text.lower())).strip()
+    vector = [0.0] * TRIGRAM_DIMENSIONS
+    for i in range(len(text) - 2):
+        bucket = int.from_bytes(hashlib.blake2b(text[i:i + 3].encode("utf-8"), digest_size=4).digest(), "big")
+        vector[bucket % TRIGRAM_DIMENSIONS] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class SimilarityIndex:
+    """
+    In-process index from a query's trigram vector to the exact cache key of its response.
+    Entries are only pointers; the response itself is re-read from Redis, so expiry is still Redis's.
+    """
+
+    def __init__(self, max_size: int = SIMILARITY_INDEX_SIZE):
+        self.entries: deque = deque(maxlen=max_size)
+
+    def add(self, scope: str, text: str, cache_key: str):
+        self.entries.append((scope, trigram_vector(text), cache_key, time.time()))
+
+    def nearest(self, scope: str, text: str, threshold: float, max_age: float) -> Optional[Tuple[str, float]]:
+        vector = trigram_vector(text)
+        cutoff = time.time() - max_age
+        best = None
+        for entry_scope, entry_vector, cache_key, created_at in self.entries:
+            if entry_scope != scope or created_at < cutoff:
+                continue
+            similarity = sum(a * b for a, b in zip(vector, entry_vector))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (cache_key, similarity)
+        return best
+
+
+similarity_index = SimilarityIndex()
+
+async def record_stat(node: str, field: str):
+    llm_cache_stats[field] += 1
+    try:
+        await get_redis_client().hincrby(STATS_KEY, f"{node}:{field}", 1)
+    except Exception:
+        pass
+
+async def read_response(cache_key: str, schema: type) -> Optional[BaseModel]:
+    data = await get_redis_client().get(cache_key)
+    return schema.model_validate_json(data) if data else None
+
+async def cached_llm_call(
+    node: str,
+    provider: str,
+    model_name: str,
+    schema: type,
+    prompt: str,
+    call: Callable[[], Awaitable[T]],
+    similarity_text: Optional[str] = None,
+    similarity_scope: str = "",
+) -> T:
+    """
+    Return the structured response for this exact prompt from Redis, calling `call` on a miss.
+    With `similarity_text` (e.g. the research query) and LLM_CACHE_SIMILARITY on, a response
+    cached for a near-identical text in the same node/model/scope is reused as well.
+    Falls through to `call` when the node's flag is off or Redis is not initialized.
+    """
+    settings = get_settings()
+    if not getattr(settings, NODE_CACHE_FLAGS.get(node, ""), False) or not is_redis_initialized():
+        return await call()
+
+    cache_key = get_llm_cache_key(node, provider, model_name, schema, prompt)
+    scope = f"{node}:{provider}:{model_name}:{schema.__name__}:{similarity_scope}"
+    use_similarity = similarity_text is not None and settings.llm_cache_similarity
+
+    try:
+        cached = await read_response(cache_key, schema)
+        if cached is not None:
+            logger.info(f"[llm_cache] Hit | node={node} | model={model_name}")
+            await record_stat(node, "hits")
+            return cached
+
+        if use_similarity:
+            nearest = similarity_index.nearest(scope, similarity_text, settings.llm_cache_similarity_threshold, settings.llm_cache_ttl)
+            if nearest is not None:
+                cached = await read_response(nearest[0], schema)
+                if cached is not None:
+                    logger.info(f"[llm_cache] Similar hit | node={node} | model={model_name} | similarity={nearest[1]:.3f}")
+                    await record_stat(node, "similar_hits")
+                    return cached
+    except Exception as e:
+        logger.warning(f"[llm_cache] Read failed, bypassing cache | node={node} | {e}")
+        await record_stat(node, "errors")
+        return await call()
+
+    await record_stat(node, "misses")
+    response = await call()
+
+    try:
+        await get_redis_client().set(cache_key, response.model_dump_json().encode("utf-8"), ex=settings.llm_cache_ttl)
+        if use_similarity:
+            similarity_index.add(scope, similarity_text, cache_key)
+    except Exception as e:
+        logger.warning(f"[llm_cache] Write failed | node={node} | {e}")
+    return response
+
+async def get_llm_cache_stats() -> dict:
+    """Process-local counters plus the per-node counters shared by all workers"""
+    shared: Dict[str, int] = {}
+    try:
+        raw = await get_redis_client().hgetall(STATS_KEY)
+        shared = {k.decode("utf-8"): int(v) for k, v in raw.items()}
+    except Exception:
+        pass
+
+    return {
+        "local": dict(llm_cache_stats),
+        "shared": shared,
+        "similarity_index_size": len(similarity_index.entries)
+    }
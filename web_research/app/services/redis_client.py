@@ -19,6 +19,9 @@ async def close_redis() -> None:
         await redis_client.close()
         redis_client = None
 
+def is_redis_initialized() -> bool:
+    return redis_client is not None
+
 def get_redis_client() ->aioredis.Redis:
     assert redis_client is not None, "Redis Client is not initialized"
     return redis_client
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict
+from app.core.llm_response_models import ResearchTool
+from app.services.redis_client import get_redis_client, is_redis_initialized
+from app.utils.config import get_settings
+from app.utils.logger import logger
+
+# Seconds a cached tool response stays valid. Web results go stale much faster
+# than encyclopedia pages or papers.
+SEARCH_CACHE_TTL = {
+    ResearchTool.TAVILY: 60 * 60,
+    ResearchTool.WIKIPEDIA: 24 * 60 * 60,
+    ResearchTool.ARXIV: 12 * 60 * 60,
+}
+DEFAULT_SEARCH_CACHE_TTL = 60 * 60
+
+# Cross-worker fill lock: how long a worker may hold it and how often the
+# others look for the value it is about to write.
+FILL_LOCK_TTL_MS = 30_000
+FILL_POLL_INTERVAL = 0.25
+
+STATS_KEY = "search_cache:stats"
+
+inflight_searches: Dict[str, asyncio.Future] = {}
+cache_stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, trim punctuation and collapse whitespace so trivially different queries share a key"""
+    query = query.lower().strip().strip("?!.,;:\"'")
+    return re.sub(r"\s+", " ", query)
+
+def get_search_cache_key(tool_name: ResearchTool, query: str, max_results: int) -> str:
+    digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+    return f"search_cache:{tool_name.value}:{max_results}:{digest}"
+
+def is_cacheable(raw_results: Any) -> bool:
+    """Empty responses are usually swallowed tool errors and should not be pinned in the cache"""
+    if isinstance(raw_results, dict):
+        return bool(raw_results.get("results"))
+    return bool(raw_results)
+
+async def record_stat(tool_name: ResearchTool, field: str):
+    cache_stats[field] += 1
+    try:
+        await get_redis_client().hincrby(STATS_KEY, f"{tool_name.value}:{field}", 1)
+    except Exception:
+        pass
+
+async def read_cached(cache_key: str):
+    data = await get_redis_client().get(cache_key)
+    if data:
+        return json.loads(data.decode("utf-8"))
+    return None
+
+async def fill_cache(
+    tool_name: ResearchTool,
+    cache_key: str,
+    fetch: Callable[[], Awaitable[Any]],
+):
+    """Fetch once across workers: the lock holder calls the tool, everyone else waits for its write"""
+    redis_client = get_redis_client()
+    lock_key = f"{cache_key}:lock"
+    has_lock = await redis_client.set(lock_key, b"1", nx=True, px=FILL_LOCK_TTL_MS)
+
+    if not has_lock:
+        waited = 0.0
+        while waited < FILL_LOCK_TTL_MS / 1000:
+            await asyncio.sleep(FILL_POLL_INTERVAL)
+            waited += FILL_POLL_INTERVAL
+            cached = await read_cached(cache_key)
+            if cached is not None:
+                await record_stat(tool_name, "coalesced")
+                return cached
+            if not await redis_client.exists(lock_key):
+                break
+
+    try:
+        raw_results = await fetch()
+        if is_cacheable(raw_results):
+            await redis_client.set(
+                cache_key,
+                json.dumps(raw_results, default=str).encode("utf-8"),
+                ex=SEARCH_CACHE_TTL.get(tool_name, DEFAULT_SEARCH_CACHE_TTL)
+            )
+        return raw_results
+    finally:
+        if has_lock:
+            await redis_client.delete(lock_key)
+
+async def lookup_or_fill(
+    tool_name: ResearchTool,
+    query: str,
+    cache_key: str,
+    fetch: Callable[[], Awaitable[Any]],
+):
+    try:
+        cached = await read_cached(cache_key)
+    except Exception as e:
+        logger.warning(f"[search_cache] Read failed, bypassing cache | key={cache_key} | {e}")
+        await record_stat(tool_name, "errors")
+        return await fetch()
+
+    if cached is not None:
+        logger.info(f"[search_cache] Hit | tool={tool_name.value} | query={query!r}")
+        await record_stat(tool_name, "hits")
+        return cached
+
+    await record_stat(tool_name, "misses")
+    return await fill_cache(tool_name, cache_key, fetch)
+
+async def cached_search(
+    tool_name: ResearchTool,
+    query: str,
+    max_results: int,
+    fetch: Callable[[], Awaitable[Any]],
+):
+    """
+    Return the tool response for (tool, query, max_results) from Redis, calling `fetch` on a miss.
+    Concurrent misses for the same key in this process share a single fetch; if the caller
+    running it is cancelled, one of the waiters runs it instead.
+    Falls through to `fetch` when caching is disabled or Redis is not initialized.
+    """
+    settings = get_settings()
+    if not settings.search_cache_enabled or not is_redis_initialized():
+        return await fetch()
+
+    cache_key = get_search_cache_key(tool_name, query, max_results)
+
+    inflight = inflight_searches.get(cache_key)
+    if inflight is not None:
+        logger.info(f"[search_cache] Awaiting in-flight fetch | tool={tool_name.value} | query={query!r}")
+        await record_stat(tool_name, "coalesced")
+    while inflight is not None:
+        # asyncio.wait never cancels the shared future, whatever happens to this waiter
+        await asyncio.wait([inflight])
+        if not inflight.cancelled():
+            return inflight.result()
+        # The leader was cancelled: the first waiter to wake up takes over the fetch
+        logger.info(f"[search_cache] In-flight fetch cancelled, retrying | tool={tool_name.value} | query={query!r}")
+        inflight = inflight_searches.get(cache_key)
+
+    # Register before the first await so concurrent callers coalesce onto this fetch
+    future = asyncio.get_running_loop().create_future()
+    inflight_searches[cache_key] = future
+    try:
+        raw_results = await lookup_or_fill(tool_name, query, cache_key, fetch)
+        future.set_result(raw_results)
+        return raw_results
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark retrieved so a fetch nobody else awaited does not log "exception never retrieved"
+        future.exception()
+        raise
+    finally:
+        inflight_searches.pop(cache_key, None)
+
+async def get_search_cache_stats() -> dict:
+    """Process-local counters plus the per-tool counters shared by all workers"""
+    shared = {}
+    try:
+        raw = await get_redis_client().hgetall(STATS_KEY)
+        shared = {k.decode("utf-8"): int(v) for k, v in raw.items()}
+    except Exception:
+        pass
+
+    return {
+        "local": dict(cache_stats),
+        "shared": shared,
+        "inflight": len(inflight_searches)
+    }
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict, Optional, Set
+from app.services.redis_client import get_redis_client
+from app.services.cache import get_task_status, TERMINAL_STATUSES, TASK_CHANNEL_PATTERN
+from app.utils.logger import logger
+
+# SSE comment sent while nothing happens so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+
+class TaskEventHub:
+    """
+    One pattern subscription per process, fanned out to local listeners. Long-poll and SSE
+    clients then cost an in-memory queue each instead of a Redis connection each.
+    """
+
+    def __init__(self):
+        self.listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self.pubsub = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        async with self.lock:
+            if self.reader is not None and not self.reader.done():
+                return
+            self.pubsub = get_redis_client().pubsub()
+            await self.pubsub.psubscribe(TASK_CHANNEL_PATTERN)
+            self.reader = asyncio.create_task(self.read_loop())
+            logger.info("[TaskEventHub] Subscribed to task status events")
+
+    async def stop(self):
+        if self.reader is not None:
+            self.reader.cancel()
+            await asyncio.gather(self.reader, return_exceptions=True)
+            self.reader = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+    async def read_loop(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[TaskEventHub] Read failed, resubscribing | {e}")
+                await asyncio.sleep(1)
+                await self.pubsub.psubscribe(TASK_CHANNEL_PATTERN)
+                continue
+
+            if not message or message.get("type") != "pmessage":
+                continue
+            channel = message["channel"].decode("utf-8")
+            task_id = channel.split(":")[1]
+            for queue in self.listeners.get(task_id, ()):
+                queue.put_nowait(json.loads(message["data"].decode("utf-8")))
+
+    async def listen(self, task_id: str) -> asyncio.Queue:
+        await self.start()
+        queue = asyncio.Queue()
+        self.listeners.setdefault(task_id, set()).add(queue)
+        return queue
+
+    def unlisten(self, task_id: str, queue: asyncio.Queue):
+        queues = self.listeners.get(task_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            self.listeners.pop(task_id, None)
+
+
+task_event_hub = TaskEventHub()
+
+async def wait_for_task_update(task_id: str, timeout: float) -> Optional[dict]:
+    """
+    Long-poll: return the task record as soon as its status changes, or the current record
+    once `timeout` passes. Finished or unknown tasks return immediately.
+    """
+    queue = await task_event_hub.listen(task_id)
+    try:
+        # Read after subscribing so a transition in between is not missed
+        current = await get_task_status(task_id)
+        if current is None or current.get("status") in TERMINAL_STATUSES or timeout <= 0:
+            return current
+        try:
+            return await asyncio.wait_for(queue.get(), timeout)
+        except TimeoutError:
+            return await get_task_status(task_id)
+    finally:
+        task_event_hub.unlisten(task_id, queue)
+
+async def subscribe_task_updates(task_id: str) -> AsyncIterator[Optional[dict]]:
+    """
+    Yield the current task record, then every update until the task finishes.
+    Yields None every KEEPALIVE_SECONDS without updates.
+    """
+    queue = await task_event_hub.listen(task_id)
+    try:
+        current = await get_task_status(task_id)
+        if current is None:
+            return
+        yield current
+        status = current.get("status")
+
+        while status not in TERMINAL_STATUSES:
+            try:
+                update = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except TimeoutError:
+                yield None
+                continue
+            status = update.get("status")
+            yield update
+    finally:
+        task_event_hub.unlisten(task_id, queue)
@@ -21,6 +21,88 @@ class Settings(BaseSettings):
 
     api_base_url: str | None = None
 
+    # Research job queue (Redis Streams) and workers
+    job_queue_stream: str = "research:jobs"
+    job_queue_group: str = "research-workers"
+    job_visibility_timeout: int = 300
+    job_max_deliveries: int = 3
+    worker_concurrency: int = 2
+
+    # In-process graph and model client caches (idle TTLs in seconds)
+    graph_cache_max_size: int = 16
+    graph_cache_idle_ttl: int = 3600
+    model_pool_max_size: int = 64
+    model_pool_idle_ttl: int = 1800
+
+    # Search tool result cache
+    search_cache_enabled: bool = True
+    # Wikipedia page metadata LRU keyed by revision id (0 disables)
+    wikipedia_page_cache_size: int = 512
+
+    # Search tool scheduling
+    tool_global_concurrency: int = 32
+    # Return whatever searches finished once the depth-dependent time budget runs out
+    search_partial_results: bool = False
+    # Stream the planner's output and start each query's searches as soon as it is planned
+    streaming_planner: bool = False
+    # Search the raw research query on Wikipedia/Tavily while the planner runs
+    speculative_search: bool = False
+
+    # Upper bound on search result tokens packed into the synthesis prompt
+    # (further capped at half the model's context window)
+    synthesis_context_tokens: int = 24000
+    # On research_more iterations, extend the report from the new results only instead of rewriting it
+    incremental_synthesis: bool = True
+    # Check citation URLs and markers locally before (or instead of) the LLM quality check; quotes that
+    # barely match their source are pointed out to the reviewing model, never failed outright
+    citation_precheck: bool = True
+
+    # LLM response cache: exact prompt matches in Redis, enabled per node
+    llm_cache_ttl: int = 86400
+    llm_cache_planner: bool = True
+    llm_cache_synthesis: bool = True
+    llm_cache_quality: bool = True
+    # Also reuse planner responses for near-identical research queries (local index of character
+    # trigram vectors: surface similarity, not semantic)
+    llm_cache_similarity: bool = False
+    llm_cache_similarity_threshold: float = 0.95
+
+    # Tiered quality gate: deterministic report heuristics, then an optional small model
+    # (e.g. ollama/qwen2.5), escalating to the main model only for borderline scores
+    quality_gate_heuristics: bool = True
+    quality_gate_provider: str = "ollama"
+    quality_gate_model: str | None = None
+    quality_gate_pass_score: float = 0.85
+    quality_gate_fail_score: float = 0.6
+
+    # Search results are kept out of the checkpointed state in a content-addressed blob store:
+    # "redis" (falls back to files when Redis is not initialized) or "file". Blobs expire
+    # search_blob_ttl seconds after they were last written or loaded (files by mtime)
+    search_blob_store: str = "redis"
+    search_blob_dir: str = ".search_blobs"
+    search_blob_ttl: int = 7 * 24 * 3600
+    search_blob_cache_size: int = 256
+
+    # Checkpoint retention (seconds; 0 disables the TTL). Every checkpoint key expires after
+    # checkpoint_ttl, refreshed on read; completed runs are compacted to their last
+    # checkpoint_keep_last checkpoints, which then expire after checkpoint_completed_ttl
+    checkpoint_ttl: int = 86400
+    checkpoint_completed_ttl: int = 3600
+    checkpoint_keep_last: int = 1
+    checkpoint_compaction: bool = True
+
+    # Admission control: runs cost depth weight (1/2/4) x max_iteration units, capped globally and
+    # per API key across all processes; a saturated request queues (in arrival order) for admission_queue_timeout
+    # seconds, then gets 429 with Retry-After. Async jobs wait in the worker instead
+    admission_control: bool = True
+    admission_global_capacity: int = 80
+    admission_tenant_capacity: int = 40
+    admission_queue_timeout: float = 10.0
+    admission_retry_after: int = 10
+    admission_lease_ttl: int = 120
+    # /research/async answers 429 once this many jobs are waiting in the stream
+    admission_max_queued_jobs: int = 200
+
     class Config:
         env_file = ".env"
 
@@ -1,8 +1,12 @@
+import asyncio
+import time
 from app.models.models import ResearchDepth
 from datetime import datetime, timezone
-from langgraph.checkpoint.memory import MemorySaver
-from app.core.graph import create_graph
-from app.services.cache import store_task_status
+from app.services.cache import store_task_status, store_thread_meta, update_task_progress
+from app.services.checkpointer import get_or_create_graph
+from app.services.checkpoint_retention import checkpoint_compactor, compact_for_resume
+from app.services.cancellation import ThreadBusyError, cancellation_registry
+from app.utils.logger import logger
 
 def get_research_depth(depth:str) ->ResearchDepth:
     if depth is None:
@@ -15,6 +19,35 @@ def get_research_depth(depth:str) ->ResearchDepth:
     }
     return mapping.get(depth.lower(), ResearchDepth.MODERATE)
 
+async def record_progress(task_id: str, fields: dict, node_seconds: tuple | None = None):
+    """Progress is best effort; a failed write must not fail the research run"""
+    try:
+        await update_task_progress(task_id, fields, node_seconds)
+    except Exception as e:
+        logger.warning(f"[record_progress] Could not update progress | task_id={task_id} | {e}")
+
+async def stream_with_progress(app_graph, task_id: str, initial_state: dict, config: dict, context: dict) -> dict:
+    """
+    Run the graph, writing node transitions and per-node elapsed time to the task's progress hash.
+    Returns the final state.
+    """
+    result = {}
+    started = {}
+    async for mode, chunk in app_graph.astream(initial_state, config=config, context=context, stream_mode=["tasks", "values"]):
+        if mode == "values":
+            result = chunk
+            await record_progress(task_id, {
+                "iteration": chunk.get("iteration_count", 0),
+                "search_results_count": len(chunk.get("search_results", []))
+            })
+        elif "input" in chunk:
+            started[chunk["id"]] = time.monotonic()
+            await record_progress(task_id, {"current_node": chunk["name"]})
+        else:
+            elapsed = time.monotonic() - started.pop(chunk["id"], time.monotonic())
+            await record_progress(task_id, {"last_completed_node": chunk["name"]}, (chunk["name"], elapsed))
+    return result
+
 
 async def run_research_agent(
     task_id: str,
@@ -23,7 +56,9 @@ async def run_research_agent(
     max_iteration: int,
     depth: str,
     model_provider: str,
-    model_name: str
+    model_name: str,
+    api_key: str | None = None,
+    model_routing: dict | None = None
 ):
     try:
         await store_task_status(task_id, "processing", {
@@ -33,11 +68,10 @@ async def run_research_agent(
 
         research_depth = get_research_depth(depth)
 
-        checkpointer = MemorySaver()
-        app_graph = create_graph(
-            checkpointer=checkpointer,
+        app_graph = await get_or_create_graph(
+            model_provider=model_provider,
             model_name=model_name,
-            model_provider=model_provider
+            model_routing=model_routing
         )
 
         config = {"configurable": {"thread_id": thread_id}}
@@ -50,13 +84,48 @@ async def run_research_agent(
             "search_results": [],
         }
 
-        result = await app_graph.ainvoke(initial_state, config=config)
+        # A re-delivered job continues from the previous worker's last checkpoint
+        snapshot = await app_graph.aget_state(config)
+        if snapshot.next:
+            # The previous worker may only be stalled; leave the job pending until its run lets go
+            if not await cancellation_registry.claim(thread_id):
+                raise ThreadBusyError(f"Thread {thread_id} is still running in another process")
+            logger.info(f"[run_research_agent] Resuming | task_id={task_id} | thread_id={thread_id} | next={list(snapshot.next)}")
+            await compact_for_resume(thread_id)
+            initial_state = None
+        else:
+            await store_thread_meta(thread_id, {
+                "query": query,
+                "max_iteration": max_iteration,
+                "depth": depth,
+                "model_provider": model_provider,
+                "model_name": model_name,
+                "model_routing": model_routing
+            })
+
+        cancellation = await cancellation_registry.register(thread_id, asyncio.current_task())
+        try:
+            result = await stream_with_progress(app_graph, task_id, initial_state, config, {"api_key": api_key, "cancellation": cancellation})
+        except asyncio.CancelledError:
+            if not cancellation.cancelled:
+                raise
+            # Cancelled on request: a final status, so the worker acknowledges the job instead of re-running it
+            asyncio.current_task().uncancel()
+            logger.info(f"[run_research_agent] Cancelled | task_id={task_id} | thread_id={thread_id}")
+            await store_task_status(task_id, "cancelled", {
+                "thread_id": thread_id,
+                "query": query,
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            })
+            return
+        finally:
+            await cancellation_registry.unregister(thread_id)
 
         final_result = {
             "thread_id": thread_id,
             "query": query,
-            "report": result.get('synthesis').get('report') if result.get('synthesis') else None,
-            "citations": result.get('synthesis').get('citations') if result.get('synthesis') else None,
+            "report": result['synthesis'].report if result.get('synthesis') else None,
+            "citations": [c.model_dump(mode="json") for c in result['synthesis'].citations] if result.get('synthesis') else None,
             "iterations": result.get('iteration_count', 0),
             "search_results_count": len(result.get("search_results", [])),
             "depth": depth
@@ -65,14 +134,18 @@ async def run_research_agent(
         await store_task_status(task_id, "completed", {
             "thread_id": thread_id,
             "query": query,
-            "completed_at": datetime.now(timezone.utc),
+            "completed_at": datetime.now(timezone.utc).isoformat(),
             "result": final_result
         })
+        checkpoint_compactor.schedule(thread_id)
+
+    except ThreadBusyError:
+        raise
 
     except Exception as e:
         await store_task_status(task_id, "failed", {
             "thread_id": thread_id,
             "query": query,
-            "completed_at": datetime.now(timezone.utc),
+            "completed_at": datetime.now(timezone.utc).isoformat(),
             "error": str(e)
         })
\ No newline at end of file
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from app.utils.logger import logger
+
+
+class ResourceCache:
+    """
+    LRU cache with idle expiry for expensive in-process resources (compiled graphs, model clients).
+    `on_evict(key, value)` is called for every entry dropped by size, idle time or `pop`,
+    so owners can close what the value holds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        idle_ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.entry_stats: Dict[Hashable, dict] = {}
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keys(self) -> List[Hashable]:
+        return list(self.entries.keys())
+
+    def get(self, key: Hashable) -> Any:
+        self.evict_idle()
+        if key not in self.entries:
+            return None
+
+        self.entries.move_to_end(key)
+        stats = self.entry_stats[key]
+        stats["hits"] += 1
+        stats["last_used"] = time.time()
+        return self.entries[key]
+
+    def put(self, key: Hashable, value: Any, build_time: float = 0.0) -> None:
+        if key in self.entries:
+            self.pop(key)
+
+        now = time.time()
+        self.entries[key] = value
+        self.entry_stats[key] = {"hits": 0, "build_time": round(build_time, 4), "created_at": now, "last_used": now}
+
+        while len(self.entries) > self.max_size:
+            oldest = next(iter(self.entries))
+            self.evict(oldest, reason="size")
+
+    def pop(self, key: Hashable) -> Any:
+        if key not in self.entries:
+            return None
+        return self.evict(key, reason="removed")
+
+    def evict_idle(self) -> List[Hashable]:
+        if not self.idle_ttl:
+            return []
+        cutoff = time.time() - self.idle_ttl
+        expired = [key for key, stats in self.entry_stats.items() if stats["last_used"] < cutoff]
+        for key in expired:
+            self.evict(key, reason="idle")
+        return expired
+
+    def evict(self, key: Hashable, reason: str) -> Any:
+        value = self.entries.pop(key)
+        self.entry_stats.pop(key, None)
+        self.evictions += 1
+        logger.info(f"[ResourceCache:{self.name}] Evicted | key={key} | reason={reason}")
+
+        if self.on_evict:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                logger.warning(f"[ResourceCache:{self.name}] Error closing evicted entry | key={key} | {e}")
+        return value
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        return list(self.entries.items())
+
+    def stats(self) -> dict:
+        self.evict_idle()
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "idle_ttl": self.idle_ttl,
+            "evictions": self.evictions,
+            "entries": {str(key): dict(stats) for key, stats in self.entry_stats.items()},
+        }
@@ -0,0 +1,153 @@
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import asyncio
+import signal
+import socket
+import os
+from datetime import datetime, timezone
+from app.services.redis_client import init_redis, close_redis
+from app.services.http_client import init_http_client, close_http_client
+from app.services.checkpointer import get_redis_checkpointer
+from app.services.checkpoint_retention import checkpoint_compactor
+from app.services.cancellation import cancellation_registry
+from app.services.cache import store_task_status
+from app.services import admission, job_queue
+from app.utils.config import get_settings
+from app.utils.helper import run_research_agent
+from app.utils.logger import logger
+
+READ_BLOCK_MS = 5000
+
+
+class ResearchWorker:
+    """
+    Consumes research jobs from the Redis stream. A job is acknowledged only after
+    run_research_agent has recorded its final status, so a crashed worker's jobs are
+    re-delivered to another consumer once their visibility timeout passes.
+    """
+
+    def __init__(self, consumer: str, concurrency: int):
+        self.consumer = consumer
+        self.concurrency = concurrency
+        self.slots = asyncio.Semaphore(concurrency)
+        self.running: set[asyncio.Task] = set()
+        self.stopping = asyncio.Event()
+
+    def stop(self):
+        logger.info(f"[worker] Stopping | consumer={self.consumer} | in_flight={len(self.running)}")
+        self.stopping.set()
+
+    async def run(self):
+        await job_queue.ensure_consumer_group()
+        logger.info(f"[worker] Started | consumer={self.consumer} | concurrency={self.concurrency}")
+
+        while not self.stopping.is_set():
+            await self.slots.acquire()
+            self.slots.release()
+            free = self.concurrency - len(self.running)
+
+            try:
+                jobs = await job_queue.claim_stale_jobs(self.consumer, free)
+                if not jobs:
+                    jobs = await job_queue.read_new_jobs(self.consumer, free, READ_BLOCK_MS)
+            except Exception as e:
+                logger.exception(f"[worker] Error reading jobs: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            for message_id, job in jobs:
+                await self.slots.acquire()
+                task = asyncio.create_task(self.handle(message_id, job))
+                self.running.add(task)
+                task.add_done_callback(self.job_done)
+
+        if self.running:
+            await asyncio.gather(*self.running, return_exceptions=True)
+        logger.info(f"[worker] Stopped | consumer={self.consumer}")
+
+    def job_done(self, task: asyncio.Task):
+        self.running.discard(task)
+        self.slots.release()
+
+    async def heartbeat(self, message_id: str):
+        settings = get_settings()
+        interval = max(1, settings.job_visibility_timeout // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job_queue.extend_visibility(self.consumer, message_id)
+            except Exception as e:
+                logger.warning(f"[worker] Heartbeat failed | message_id={message_id} | {e}")
+
+    async def handle(self, message_id: str, job: dict):
+        settings = get_settings()
+        task_id = job.get("task_id")
+
+        deliveries = await job_queue.get_delivery_count(message_id)
+        if deliveries > settings.job_max_deliveries:
+            logger.error(f"[worker] Giving up after {deliveries - 1} deliveries | task_id={task_id}")
+            await store_task_status(task_id, "failed", {
+                "thread_id": job.get("thread_id"),
+                "query": job.get("query"),
+                "completed_at": datetime.now(timezone.utc).isoformat(),
+                "error": f"Job was abandoned by {settings.job_max_deliveries} workers"
+            })
+            await job_queue.delete_job_api_key(task_id)
+            await job_queue.ack_job(message_id)
+            return
+
+        logger.info(f"[worker] Running job | task_id={task_id} | message_id={message_id} | delivery={deliveries}")
+        heartbeat = asyncio.create_task(self.heartbeat(message_id))
+        try:
+            api_key = await job_queue.get_job_api_key(task_id)
+            # Waits (status stays pending, the heartbeat keeps the job) until the cluster has capacity
+            lease = await admission.acquire(api_key, job["depth"], job["max_iteration"], wait=None)
+            try:
+                await run_research_agent(
+                    task_id,
+                    job["thread_id"],
+                    job["query"],
+                    job["max_iteration"],
+                    job["depth"],
+                    job["model_provider"],
+                    job["model_name"],
+                    api_key,
+                    job.get("model_routing")
+                )
+            finally:
+                await admission.release(lease)
+            await job_queue.delete_job_api_key(task_id)
+            await job_queue.ack_job(message_id)
+            logger.info(f"[worker] Job finished | task_id={task_id}")
+        except Exception:
+            # Left pending: it is re-delivered after the visibility timeout
+            logger.exception(f"[worker] Job crashed | task_id={task_id}")
+        finally:
+            heartbeat.cancel()
+
+
+async def main(concurrency: int):
+    await init_redis()
+    init_http_client()
+    await get_redis_checkpointer()
+
+    worker = ResearchWorker(consumer=f"{socket.gethostname()}-{os.getpid()}", concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await checkpoint_compactor.stop()
+        await cancellation_registry.stop()
+        await close_http_client()
+        await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Research job worker")
+    parser.add_argument("--concurrency", type=int, default=get_settings().worker_concurrency)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
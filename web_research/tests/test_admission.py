@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import fakeredis.aioredis
+import app.services.redis_client as redis_client
+from app.services import admission
+from app.utils.config import get_settings
+
+SETTINGS = {
+    "admission_control": True,
+    "admission_global_capacity": 10,
+    "admission_tenant_capacity": 6,
+    "admission_lease_ttl": 3,
+}
+
+
+class AdmissionTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        redis_client.redis_client = fakeredis.aioredis.FakeRedis()
+        settings = get_settings()
+        self.saved_settings = {name: getattr(settings, name) for name in SETTINGS}
+        for name, value in SETTINGS.items():
+            setattr(settings, name, value)
+        self.poll = patch.object(admission, "POLL_INTERVAL", 0.02)
+        self.poll.start()
+
+    async def asyncTearDown(self):
+        self.poll.stop()
+        for name, value in self.saved_settings.items():
+            setattr(get_settings(), name, value)
+        await redis_client.redis_client.aclose()
+        redis_client.redis_client = None
+
+    async def lease(self, api_key: str, depth: str, max_iteration: int, wait=None):
+        return await admission.acquire(api_key, depth, max_iteration, wait)
+
+    async def test_caps_and_release(self):
+        first = await self.lease("a", "deep", 1)
+        with self.assertRaises(admission.AdmissionRejected):
+            # Tenant "a" holds 4 of its 6 units
+            await self.lease("a", "moderate", 2, wait=0.1)
+        other = await self.lease("b", "deep", 1)
+        self.assertEqual((await admission.get_admission_stats())["running_cost"], 8)
+
+        await admission.release(first)
+        await admission.release(other)
+        self.assertEqual((await admission.get_admission_stats())["running_cost"], 0)
+
+    async def test_queued_run_is_not_starved_by_later_smaller_runs(self):
+        held = [await self.lease("a", "deep", 1), await self.lease("d", "deep", 1)]
+        # Needs 6 units while only 2 are free
+        big = asyncio.create_task(self.lease("b", "moderate", 3))
+        await asyncio.sleep(0.1)
+        self.assertFalse(big.done())
+
+        # 2 units would fit, but they are reserved for the run queued ahead
+        small = asyncio.create_task(self.lease("c", "moderate", 1))
+        await asyncio.sleep(0.1)
+        self.assertFalse(small.done())
+
+        await admission.release(held[0])
+        big_lease = await asyncio.wait_for(big, 1)
+        await asyncio.sleep(0.1)
+        self.assertFalse(small.done())
+
+        await admission.release(held[1])
+        small_lease = await asyncio.wait_for(small, 1)
+        self.assertEqual((await admission.get_admission_stats())["running_cost"], 8)
+        await admission.release(big_lease)
+        await admission.release(small_lease)
+
+    async def test_tenant_at_its_cap_does_not_block_other_tenants(self):
+        held = await self.lease("a", "deep", 1)
+        # 4 held + 4 more would exceed tenant "a"'s cap of 6
+        queued = asyncio.create_task(self.lease("a", "moderate", 2))
+        await asyncio.sleep(0.1)
+        self.assertFalse(queued.done())
+
+        # 4 held + 4 reserved for "a"'s queued run + 2 still fits the global cap of 10
+        other = await asyncio.wait_for(self.lease("b", "moderate", 1), 1)
+        self.assertIsNotNone(other)
+        self.assertFalse(queued.done())
+
+        await admission.release(held)
+        await admission.release(await asyncio.wait_for(queued, 1))
+        await admission.release(other)
+
+    async def test_renewal_restores_a_dropped_lease(self):
+        lease = await self.lease("a", "shallow", 1)
+        await redis_client.redis_client.delete(admission.GLOBAL_LEASES_KEY, admission.get_tenant_leases_key(lease.tenant))
+
+        # Renewal runs every ttl // 3 = 1 second
+        await asyncio.sleep(1.2)
+        self.assertIsNotNone(await redis_client.redis_client.zscore(admission.GLOBAL_LEASES_KEY, lease.member))
+        self.assertEqual((await admission.get_admission_stats())["running_cost"], 1)
+        await admission.release(lease)
+
+    async def test_stream_that_never_starts_releases_its_lease(self):
+        from app.api.routes import stream_agent_events
+
+        async def agent_events():
+            yield {"type": "token", "content": "never reached"}
+
+        lease = await admission.acquire("a", "deep", 1, wait=None, renew=False)
+        response = stream_agent_events("thread", {"type": "started"}, agent_events(), lease)
+        # Not renewed before the client reads the stream, so an unread lease runs out on its own
+        self.assertIsNone(lease.renewer)
+        self.assertEqual((await admission.get_admission_stats())["running_cost"], 4)
+
+        # The client left before the body was iterated; only the background task runs
+        await response.background()
+        await admission.release(lease)
+        self.assertEqual((await admission.get_admission_stats())["running_cost"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import fakeredis.aioredis
+import app.services.redis_client as redis_client
+from app.core.llm_response_models import ResearchTool, SearchQueryResult, SearchResult, SourceType
+from app.services import blob_store
+from app.utils.config import get_settings
+
+
+def make_result(query: str) -> SearchQueryResult:
+    return SearchQueryResult(
+        query=query,
+        tool=ResearchTool.TAVILY,
+        source_type=SourceType.WEB,
+        results=[SearchResult(title=query, url=f"https://example.com/{query}", content=f"About {query}")],
+    )
+
+
+class LoadSearchResultsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        redis_client.redis_client = fakeredis.aioredis.FakeRedis()
+        settings = get_settings()
+        self.saved_store = settings.search_blob_store
+        settings.search_blob_store = "redis"
+        blob_store.blob_cache.clear()
+
+    async def asyncTearDown(self):
+        get_settings().search_blob_store = self.saved_store
+        blob_store.blob_cache.clear()
+        await redis_client.redis_client.aclose()
+        redis_client.redis_client = None
+
+    async def test_missing_blob_is_reported(self):
+        refs = await blob_store.store_search_results([make_result("first"), make_result("second")])
+        # Evicted from Redis and from this process's decoded cache
+        await redis_client.redis_client.delete(blob_store.get_blob_key(refs[0].digest))
+        blob_store.blob_cache.clear()
+
+        missing = []
+        results = await blob_store.load_search_results(refs, missing)
+        self.assertEqual([result.query for result in results], ["second"])
+        self.assertEqual(missing, [refs[0].digest])
+
+    async def test_complete_load_reports_nothing(self):
+        refs = await blob_store.store_search_results([make_result("first")])
+        blob_store.blob_cache.clear()
+
+        missing = []
+        results = await blob_store.load_search_results(refs, missing)
+        self.assertEqual([result.query for result in results], ["first"])
+        self.assertEqual(missing, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
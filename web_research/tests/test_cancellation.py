@@ -0,0 +1,32 @@
+import unittest
+import fakeredis.aioredis
+import app.services.redis_client as redis_client
+from app.services.cancellation import CancellationRegistry, get_running_key
+
+
+class CancellationClaimTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        redis_client.redis_client = fakeredis.aioredis.FakeRedis()
+        self.registry = CancellationRegistry()
+
+    async def asyncTearDown(self):
+        await redis_client.redis_client.aclose()
+        redis_client.redis_client = None
+
+    async def test_second_claim_fails_until_released(self):
+        self.assertTrue(await self.registry.claim("thread"))
+        # A retry from this process or a claim from another one both lose
+        self.assertFalse(await self.registry.claim("thread"))
+        self.assertFalse(await CancellationRegistry().claim("thread"))
+
+        await self.registry.unregister("thread")
+        self.assertTrue(await CancellationRegistry().claim("thread"))
+
+    async def test_claim_fails_while_a_run_is_registered(self):
+        await redis_client.redis_client.set(get_running_key("thread"), b"other-host-1")
+        self.assertFalse(await self.registry.claim("thread"))
+        self.assertTrue(await self.registry.is_running("thread"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+from app.core import llm
+from app.services import checkpointer
+from app.utils.resource_cache import ResourceCache
+
+
+def make_pool(max_size: int = 8, idle_ttl: float = 60.0) -> ResourceCache:
+    return ResourceCache(name="test_model_pool", max_size=max_size, idle_ttl=idle_ttl, on_evict=llm.close_owned_clients)
+
+
+class ModelPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = make_pool()
+        self.patcher = patch.object(llm, "model_pool", self.pool)
+        self.patcher.start()
+
+    async def asyncTearDown(self):
+        self.patcher.stop()
+
+    async def test_models_are_shared_per_provider_model_and_key(self):
+        first = llm.get_pooled_llm("openai", "gpt-4o-mini", "sk-one")
+        self.assertIs(llm.get_pooled_llm("openai", "gpt-4o-mini", "sk-one"), first)
+        self.assertIsNot(llm.get_pooled_llm("openai", "gpt-4o-mini", "sk-two"), first)
+        # Keys are fingerprinted, never stored
+        self.assertFalse(any("sk-one" in key for key in self.pool.keys()))
+
+    async def test_eviction_leaves_the_shared_http_client_open(self):
+        evicted = llm.get_pooled_llm("openai", "gpt-4o-mini", "sk-one")
+        kept = llm.get_pooled_llm("openai", "gpt-4o", "sk-one")
+        shared_client = evicted.root_async_client._client
+        self.assertIs(kept.root_async_client._client, shared_client)
+
+        llm.evict_pooled_llms("openai", "gpt-4o-mini")
+        await asyncio.sleep(0)
+        self.assertEqual(len(self.pool), 1)
+        self.assertFalse(shared_client.is_closed)
+        self.assertFalse(kept.root_async_client._client.is_closed)
+
+    async def test_eviction_closes_clients_an_ollama_model_owns(self):
+        evicted = llm.get_pooled_llm("ollama", "qwen2.5:7b")
+        kept = llm.get_pooled_llm("ollama", "llama3.1:8b")
+        with patch.object(llm, "MODEL_CLOSE_GRACE_SECONDS", 0):
+            llm.evict_pooled_llms("ollama", "qwen2.5:7b")
+            # Still usable by a request that fetched it just before eviction
+            self.assertFalse(evicted._async_client._client.is_closed)
+            await asyncio.sleep(0.05)
+        self.assertTrue(evicted._client._client.is_closed)
+        self.assertTrue(evicted._async_client._client.is_closed)
+        self.assertFalse(kept._async_client._client.is_closed)
+
+    async def test_size_and_idle_eviction(self):
+        self.pool.max_size = 2
+        for model_name in ("a", "b", "c"):
+            llm.get_pooled_llm("openai", model_name, "sk-one")
+        self.assertEqual(sorted(key.split(":")[1] for key in self.pool.keys()), ["b", "c"])
+
+        self.pool.entry_stats[llm.get_model_pool_key("openai", "b", "sk-one")]["last_used"] = time.time() - 120
+        self.assertIsNotNone(llm.model_pool.get(llm.get_model_pool_key("openai", "c", "sk-one")))
+        self.assertEqual([key.split(":")[1] for key in self.pool.keys()], ["c"])
+
+    async def test_structured_wrappers_are_dropped_with_their_model(self):
+        llm.get_pooled_model_entry("openai", "gpt-4o-mini", "sk-one")["structured"]["Plan"] = object()
+        llm.evict_pooled_llms("openai", "gpt-4o-mini")
+        self.assertEqual(llm.get_pooled_model_entry("openai", "gpt-4o-mini", "sk-one")["structured"], {})
+
+    async def test_evicting_a_graph_keeps_models_other_graphs_use(self):
+        graph_cache = ResourceCache(name="test_graph_cache", max_size=8, on_evict=checkpointer.release_graph)
+        with patch.object(checkpointer, "graph_cache", graph_cache):
+            for key, routing in (("g1", {"planner": "gpt-4o"}), ("g2", None)):
+                graph_cache.put(key, {"graph": None, "model_provider": "openai", "model_name": "gpt-4o-mini", "model_routing": routing})
+            for model_name in ("gpt-4o", "gpt-4o-mini"):
+                llm.get_pooled_llm("openai", model_name, "sk-one")
+
+            graph_cache.pop("g1")
+            # gpt-4o-mini is still used by g2
+            self.assertEqual([key.split(":")[1] for key in self.pool.keys()], ["gpt-4o-mini"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from app.core.llm_response_models import ResearchDepth
+from app.core.quality_gate import heuristic_failure, score_report
+
+
+class ScoreReportTest(unittest.TestCase):
+    def test_short_cited_paragraphs_are_not_a_citation_failure(self):
+        report = "\n\n".join(f"- Finding {i} about the topic, as reported by the source [{i}]" for i in range(1, 80))
+        heuristics = score_report(report, [], ResearchDepth.SHALLOW)
+        self.assertEqual(heuristics.citation_density, 1.0)
+        self.assertFalse(heuristics.clear_fail)
+
+    def test_uncited_paragraphs_fail(self):
+        paragraph = " ".join(["word"] * 30)
+        heuristics = score_report("\n\n".join([paragraph] * 10), [], ResearchDepth.SHALLOW)
+        self.assertEqual(heuristics.citation_density, 0.0)
+        self.assertTrue(heuristics.clear_fail)
+
+
+class HeuristicFailureTest(unittest.TestCase):
+    def test_unassessed_scores_are_left_empty(self):
+        heuristics = score_report("Too short.", [], ResearchDepth.MODERATE)
+        check = heuristic_failure(heuristics, None)
+        self.assertFalse(check.passed)
+        self.assertIsNone(check.scores.citation_accuracy)
+        self.assertIsNone(check.scores.coherence)
+        self.assertEqual(check.scores.coverage, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
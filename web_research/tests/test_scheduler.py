@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from app.core.llm_response_models import ResearchTool
+from app.core.tools.scheduler import MIN_HEDGE_SAMPLES, CircuitBreaker, TokenBucket, ToolQueueTimeoutError, ToolScheduler, ToolTimeoutError, get_tool_scheduler
+
+TOOL = ResearchTool.TAVILY
+
+
+def make_scheduler(concurrency: int = 1, **limits) -> ToolScheduler:
+    scheduler = ToolScheduler(global_concurrency=8)
+    scheduler.limits[TOOL] = {**scheduler.limits[TOOL], "concurrency": concurrency, **limits}
+    scheduler.semaphores[TOOL] = asyncio.Semaphore(concurrency)
+    scheduler.buckets[TOOL] = TokenBucket(rate=1000.0, capacity=1000)
+    scheduler.breakers[TOOL] = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    return scheduler
+
+def fake_tool(*delays: float):
+    """invoke_tool stand-in sleeping for each given delay in turn, then for the last one"""
+    calls = []
+
+    async def invoke(tool_name, query, max_results):
+        delay = delays[min(len(calls), len(delays) - 1)]
+        calls.append(query)
+        await asyncio.sleep(delay)
+        return [{"query": query, "call": len(calls)}]
+
+    return invoke, calls
+
+
+class ToolSchedulerDeadlineTest(unittest.IsolatedAsyncioTestCase):
+    async def test_queue_time_does_not_count_towards_deadline(self):
+        scheduler = make_scheduler(concurrency=1, timeout=0.3, queue_timeout=1.0)
+        invoke, calls = fake_tool(0.2)
+        with patch("app.core.tools.scheduler.invoke_tool", invoke):
+            results = await asyncio.gather(
+                scheduler.run(TOOL, "first", 5),
+                scheduler.run(TOOL, "second", 5),
+            )
+        self.assertEqual([result[0]["query"] for result in results], ["first", "second"])
+        self.assertEqual(scheduler.breakers[TOOL].failures, 0)
+
+    async def test_queue_timeout_is_not_a_breaker_failure(self):
+        scheduler = make_scheduler(concurrency=1, timeout=1.0, queue_timeout=0.05)
+        invoke, calls = fake_tool(0.3)
+        with patch("app.core.tools.scheduler.invoke_tool", invoke):
+            results = await asyncio.gather(
+                scheduler.run(TOOL, "first", 5),
+                scheduler.run(TOOL, "second", 5),
+                return_exceptions=True,
+            )
+        self.assertEqual(results[0][0]["query"], "first")
+        self.assertIsInstance(results[1], ToolQueueTimeoutError)
+        self.assertEqual(calls, ["first"])
+        self.assertEqual(scheduler.breakers[TOOL].state, "closed")
+        self.assertEqual(scheduler.breakers[TOOL].failures, 0)
+
+    async def test_call_timeout_is_a_breaker_failure(self):
+        scheduler = make_scheduler(concurrency=1, timeout=0.05)
+        invoke, _ = fake_tool(0.3)
+        with patch("app.core.tools.scheduler.invoke_tool", invoke):
+            with self.assertRaises(ToolTimeoutError):
+                await scheduler.run(TOOL, "slow", 5)
+        self.assertEqual(scheduler.breakers[TOOL].state, "open")
+        self.assertEqual(scheduler.in_flight[TOOL], 0)
+
+
+class ToolSchedulerHedgingTest(unittest.IsolatedAsyncioTestCase):
+    def record_latencies(self, scheduler: ToolScheduler, seconds: float):
+        for _ in range(MIN_HEDGE_SAMPLES):
+            scheduler.latencies[TOOL].record(seconds)
+
+    async def test_hedges_slow_call_when_capacity_is_free(self):
+        scheduler = make_scheduler(concurrency=2, timeout=2.0)
+        self.record_latencies(scheduler, 0.05)
+        invoke, calls = fake_tool(1.0, 0.01)
+        with patch("app.core.tools.scheduler.invoke_tool", invoke):
+            result = await scheduler.run(TOOL, "query", 5)
+        self.assertEqual(result[0]["call"], 2)
+        self.assertEqual(scheduler.hedges[TOOL], 1)
+
+    async def test_no_hedge_while_queued_or_saturated(self):
+        scheduler = make_scheduler(concurrency=1, timeout=2.0)
+        self.record_latencies(scheduler, 0.05)
+        invoke, calls = fake_tool(0.3, 0.01)
+        with patch("app.core.tools.scheduler.invoke_tool", invoke):
+            await asyncio.gather(
+                scheduler.run(TOOL, "first", 5),
+                scheduler.run(TOOL, "second", 5),
+            )
+        # "first" ran past the p95 with no free slot; "second" queued past it but ran fast
+        self.assertEqual(calls, ["first", "second"])
+        self.assertEqual(scheduler.hedges[TOOL], 0)
+
+
+class ToolSchedulerQueueingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_throttled_tool_does_not_hold_global_slots(self):
+        scheduler = ToolScheduler(global_concurrency=2)
+        scheduler.limits[ResearchTool.ARXIV] = {**scheduler.limits[ResearchTool.ARXIV], "queue_timeout": 0.5}
+        scheduler.semaphores[ResearchTool.ARXIV] = asyncio.Semaphore(1)
+        scheduler.limits[TOOL] = {**scheduler.limits[TOOL], "queue_timeout": 0.1}
+        invoke, calls = fake_tool(0.3)
+        with patch("app.core.tools.scheduler.invoke_tool", invoke):
+            arxiv_calls = [asyncio.create_task(scheduler.run(ResearchTool.ARXIV, f"arxiv-{i}", 5)) for i in range(4)]
+            await asyncio.sleep(0.01)
+            result = await scheduler.run(TOOL, "tavily", 5)
+            await asyncio.gather(*arxiv_calls, return_exceptions=True)
+        # One arXiv call runs, the rest queue on arXiv's own limit, leaving a global slot free
+        self.assertEqual(result[0]["query"], "tavily")
+        self.assertEqual(calls[:2], ["arxiv-0", "tavily"])
+
+    async def test_scheduler_is_kept_per_event_loop(self):
+        scheduler = get_tool_scheduler()
+        scheduler.breakers[TOOL].record_failure()
+
+        async def other_loop_scheduler():
+            return get_tool_scheduler()
+
+        # A run on another loop neither replaces nor shares this loop's limits and breakers
+        other = await asyncio.to_thread(asyncio.run, other_loop_scheduler())
+        self.assertIsNot(other, scheduler)
+        self.assertIs(get_tool_scheduler(), scheduler)
+        self.assertEqual(get_tool_scheduler().breakers[TOOL].failures, 1)
+
+if __name__ == "__main__":
+    unittest.main()
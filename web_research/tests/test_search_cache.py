@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+import fakeredis.aioredis
+import app.services.redis_client as redis_client
+from app.core.llm_response_models import ResearchTool
+from app.services.search_cache import cached_search, inflight_searches
+
+TOOL = ResearchTool.WIKIPEDIA
+
+
+class CachedSearchTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        redis_client.redis_client = fakeredis.aioredis.FakeRedis()
+
+    async def asyncTearDown(self):
+        await redis_client.redis_client.aclose()
+        redis_client.redis_client = None
+        inflight_searches.clear()
+
+    def fetcher(self, delay: float = 0.1):
+        calls = []
+
+        async def fetch():
+            calls.append(len(calls) + 1)
+            await asyncio.sleep(delay)
+            return [{"title": "Python", "fetch": len(calls)}]
+
+        return fetch, calls
+
+    async def test_concurrent_misses_share_one_fetch(self):
+        fetch, calls = self.fetcher()
+        results = await asyncio.gather(*(cached_search(TOOL, "Python", 5, fetch) for _ in range(5)))
+        self.assertEqual(calls, [1])
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(inflight_searches, {})
+
+    async def test_equivalent_queries_hit_the_cache(self):
+        fetch, calls = self.fetcher(delay=0)
+        first = await cached_search(TOOL, "Python", 5, fetch)
+        second = await cached_search(TOOL, "  python? ", 5, fetch)
+        self.assertEqual(calls, [1])
+        self.assertEqual(first, second)
+
+    async def test_waiters_take_over_when_the_leader_is_cancelled(self):
+        fetch, calls = self.fetcher()
+        leader = asyncio.create_task(cached_search(TOOL, "Python", 5, fetch))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cached_search(TOOL, "Python", 5, fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        results = await asyncio.gather(*waiters)
+        self.assertTrue(leader.cancelled())
+        # One waiter re-ran the fetch, the other two coalesced onto it
+        self.assertEqual(calls, [1, 2])
+        self.assertTrue(all(result == [{"title": "Python", "fetch": 2}] for result in results))
+        self.assertEqual(inflight_searches, {})
+
+    async def test_waiter_cancellation_does_not_cancel_the_leader(self):
+        fetch, calls = self.fetcher()
+        leader = asyncio.create_task(cached_search(TOOL, "Python", 5, fetch))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cached_search(TOOL, "Python", 5, fetch))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+
+        self.assertEqual(await leader, [{"title": "Python", "fetch": 1}])
+        self.assertTrue(waiter.cancelled())
+        self.assertEqual(calls, [1])
+
+    async def test_leader_errors_reach_waiters(self):
+        async def fetch():
+            await asyncio.sleep(0.05)
+            raise ValueError("tool down")
+
+        results = await asyncio.gather(*(cached_search(TOOL, "Python", 5, fetch) for _ in range(3)), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()